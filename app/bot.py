@@ -1,13 +1,19 @@
 import discord, os, asyncio, sys
 import config
+import dbInfo
+import pymongo
 from discord.ext import commands
 from utils.logging_config import setup_logging
+from utils.riot_client import RiotClient
 
 intents = discord.Intents.all()
 bot = commands.Bot(command_prefix="!", intents=intents)
 
 bot.logger = setup_logging(bot)
 
+# Shared Riot API client used by every cog
+bot.riot = RiotClient(config.RIOT_API, config.RIOT_APP_RATE_LIMIT, logger=bot.logger, base_url=config.RIOT_API_BASE_URL)
+
 @bot.event
 async def on_ready():
     bot.logger.info(f"Logged in as {bot.user}")
@@ -36,7 +42,18 @@ def load_extensions():
 async def main():
     async with bot:
         load_extensions()
-        await bot.start(config.DISCORD_TOKEN)
+        dbInfo.team_directory.logger = bot.logger
+        try:
+            await dbInfo.ensure_indexes(bot.logger)
+            await dbInfo.team_directory.load()
+        except pymongo.errors.PyMongoError as e:
+            # Don't keep the bot offline over it; indexes are retried next boot and teams load on first use
+            bot.logger.error(f"Database bootstrap failed, starting without it: {e}")
+        try:
+            await bot.start(config.DISCORD_TOKEN)
+        finally:
+            await bot.riot.close()
+            await dbInfo.cluster.close()
 
 
 if __name__ == "__main__":
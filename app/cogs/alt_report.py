@@ -5,6 +5,7 @@ from discord.ext import commands
 from discord.commands import Option
 import config
 import dbInfo
+from utils.riot_client import RiotUnavailableError
 
 class AltReport(commands.Cog):
     def __init__(self, bot):
@@ -41,7 +42,7 @@ class AltReport(commands.Cog):
         await ctx.defer(ephemeral=True)
 
         try:
-            player_info = dbInfo.player_collection.find_one({"discord_id": ctx.author.id})
+            player_info = await dbInfo.get_player(ctx.author.id)
 
             if not player_info:
                 return await ctx.respond(f"There is no record of your found in the database, open a modmail ticket.", ephemeral=True)
@@ -70,6 +71,7 @@ class ReportConfirmationView(discord.ui.View):
     def __init__(self, ctx, game_name, tag_line):
         super().__init__(timeout=60)
         self.ctx = ctx
+        self.bot = ctx.bot
         self.game_name = game_name
         self.tag_line = tag_line
 
@@ -82,7 +84,7 @@ class ReportConfirmationView(discord.ui.View):
                 "tag_line": self.tag_line
             }
 
-            dbInfo.player_collection.update_one(
+            await dbInfo.player_collection.update_one(
                 {"discord_id": self.ctx.author.id},
                 {"$push": {
                     "alt_accounts": alt_account  # Append the alt account object
@@ -92,6 +94,15 @@ class ReportConfirmationView(discord.ui.View):
 
             await interaction.response.send_message(f"Report for `{self.game_name}#{self.tag_line}` has been confirmed.", ephemeral=True)
             self.bot.logger.info(f"User {self.ctx.author} reported alt account: {self.game_name}#{self.tag_line}")
+
+            # Resolve the alt now so eligibility sweeps can read it from the Riot account cache
+            player_cog = self.bot.get_cog("PlayerCog")
+            try:
+                account = await player_cog.resolve_account(self.game_name, self.tag_line, refresh=True) if player_cog else None
+            except RiotUnavailableError:
+                account = None
+            if not account:
+                self.bot.logger.warning(f"Could not resolve reported alt account {self.game_name}#{self.tag_line}")
         
         except Exception as e:
             await interaction.response.send_message(f"Failed to confirm report due to: {e}", ephemeral=True)
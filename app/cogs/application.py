@@ -2,11 +2,11 @@ import discord
 from discord.ext import commands
 from datetime import datetime
 import pytz
-from app import config, dbInfo
+import config
+import dbInfo
 import logging
 import asyncio, re
 from helper import update_nickname
-from .player import PlayerCog
 from .salaries import SalaryCog
 
 season_number = 2
@@ -58,7 +58,7 @@ class ApplicationButton(discord.ui.View):
         riot_tag_line = None
         
         # Check if user has existing Riot ID in database
-        existing_player_data = dbInfo.intent_collection.find_one({"ID": interaction.user.id})
+        existing_player_data = await dbInfo.intent_collection.find_one({"ID": interaction.user.id})
         if existing_player_data:
             riot_game_name = existing_player_data.get('game_name')
             riot_tag_line = existing_player_data.get('tag_line')
@@ -169,7 +169,7 @@ class ApplicationButton(discord.ui.View):
             update_fields["Riot Tag Line"] = riot_tag_line
 
         # Update the intent collection
-        result = dbInfo.intent_collection.find_one_and_update(
+        result = await dbInfo.intent_collection.find_one_and_update(
             {"ID": interaction.user.id},
             {"$set": update_fields},
             upsert=True,
@@ -178,7 +178,7 @@ class ApplicationButton(discord.ui.View):
 
         # If they are playing, also update the player collection with Riot Game Name and Tag Line
         if responses[0] == 'Yes':
-            dbInfo.player_collection.find_one_and_update(
+            await dbInfo.player_collection.find_one_and_update(
                 {"discord_id": interaction.user.id},
                 {"$set": {
                     "game_name": riot_game_name,
@@ -215,16 +215,16 @@ class ApplicationButton(discord.ui.View):
             await riot_id_log_channel.send(f"{interaction.user.mention} updated their Riot ID: {riot_game_name}#{riot_tag_line}")
 
         # Logic for processing Riot ID for rank
-        player_record = dbInfo.player_collection.find_one({"discord_id": interaction.user.id})
+        player_record = await dbInfo.get_player(interaction.user.id)
 
         if not player_record:
             self.bot.logger.warning(f"Player record for {interaction.user.name} wasn't found. User submitted intent application but will not be assigned salary automatically.")
             return
         
         self.bot.logger.info(f"Processing rank and salary for {player_record['name']}")
-        riot_id_log_channel = self.bot.get_channel(config.failure_log_channel)
 
-        rank = await PlayerCog.process_player_and_alts(player_record, riot_id_log_channel)
+        player_cog = self.bot.get_cog("PlayerCog")
+        rank = await player_cog.process_player_and_alts(player_record) if player_cog else None
         if rank is None:
             self.bot.logger.error(f"Ran rank check but was unable to determine rank for {player_record['name']}")
             return
@@ -241,7 +241,7 @@ class ApplicationButton(discord.ui.View):
                     salary = SalaryCog.calculate_salary(highest_rank, highest_division)
                     
                     # Store the calculated salary in the player's document
-                    dbInfo.player_collection.update_one(
+                    await dbInfo.player_collection.update_one(
                         {"discord_id": player_record['discord_id']},
                         {"$set": {"salary": salary, "salary_season": season_number}}
                     )
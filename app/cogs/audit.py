@@ -13,8 +13,8 @@ class Audit(commands.Cog):
         self.audit_roles.start()
 
     async def get_team_role(self, team_code: str) -> int:
-        """Retrieve team role ID from the database."""
-        team = dbInfo.team_collection.find_one({"team_code": team_code})
+        """Retrieve team role ID from the team directory."""
+        team = await dbInfo.team_directory.get(team_code)
         if team:
             return team.get("team_id")
         return None
@@ -49,13 +49,14 @@ class Audit(commands.Cog):
         guild = self.bot.get_guild(config.lol_server)
         if guild:
             audit_channel = guild.get_channel(config.failure_log_channel)
+            players = await dbInfo.get_players_by_discord_id(dbInfo.SALARY_FIELDS)
             for member in guild.members:
                 if member.bot:
                     continue
 
                 self.bot.logger.info(f"Auditing member: {member.name}")
 
-                player_info = dbInfo.player_collection.find_one({"discord_id": member.id})
+                player_info = players.get(member.id)
                 if not player_info:
                     self.bot.logger.warning(f"No player info found for {member.name} in database")
                     continue
@@ -84,7 +85,7 @@ class Audit(commands.Cog):
                         # Compare rank order and division
                         if salary_cog.is_rank_higher(highest_rank, highest_division, peak_tier, peak_division):
                             # Update peak rank if current rank is higher
-                            dbInfo.player_collection.update_one(
+                            await dbInfo.player_collection.update_one(
                                 {'discord_id': member.id},
                                 {'$set': {'peak_rank': {'tier': highest_rank, 'division': highest_division}}}
                             )
@@ -92,7 +93,7 @@ class Audit(commands.Cog):
 
                     else:
                         # If no peak rank exists, store current as peak
-                        dbInfo.player_collection.update_one(
+                        await dbInfo.player_collection.update_one(
                             {'discord_id': member.id},
                             {'$set': {'peak_rank': {'tier': highest_rank, 'division': highest_division}}}
                         )
@@ -106,7 +107,7 @@ class Audit(commands.Cog):
                     # Free agent: only update salary if the new one is higher
                     if new_salary > current_salary:
                         self.bot.logger.info(f"Updating salary for free agent {member.name} from {current_salary} to {new_salary}")
-                        dbInfo.player_collection.update_one(
+                        await dbInfo.player_collection.update_one(
                             {"discord_id": member.id}, 
                             {"$set": {"salary": new_salary}}
                         )
@@ -116,7 +117,7 @@ class Audit(commands.Cog):
                     # If salary has been manually adjusted, only update if the new salary is higher
                     if new_salary > manually_adjusted_salary:
                         self.bot.logger.info(f"Updating manually adjusted salary for {member.name} from {manually_adjusted_salary} to {new_salary}")
-                        dbInfo.player_collection.update_one(
+                        await dbInfo.player_collection.update_one(
                             {"discord_id": member.id},
                             {"$set": {"manual_salary": new_salary}}
                         )
@@ -182,7 +183,7 @@ class Audit(commands.Cog):
 
     async def update_team_in_database(self, player_id, new_team):
         """Update player's team information in database"""
-        dbInfo.player_collection.update_one({"discord_id": player_id}, {'$set' : {'team': new_team}})
+        await dbInfo.player_collection.update_one({"discord_id": player_id}, {'$set' : {'team': new_team}})
 
 def setup(bot):
     bot.add_cog(Audit(bot))
\ No newline at end of file
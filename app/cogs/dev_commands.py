@@ -3,16 +3,11 @@ import dbInfo
 import discord, logging
 from discord.ext import commands
 from discord.commands import Option
-import aiohttp, asyncio
-from datetime import datetime, timezone
+import asyncio
 from helper import update_nickname
-
-# Split dates for 2024
-SPLITS = [
-    {"start": datetime(2024, 1, 10, tzinfo=timezone.utc), "end": datetime(2024, 5, 14, tzinfo=timezone.utc), "name": "Spring Split"},
-    {"start": datetime(2024, 5, 15, tzinfo=timezone.utc), "end": datetime(2024, 9, 25, tzinfo=timezone.utc), "name": "Summer Split"},
-    {"start": datetime(2024, 9, 25, tzinfo=timezone.utc), "end": None, "name": "Fall Split"},  # End date unknown
-]
+from utils.riot_client import RiotUnavailableError
+from utils.sweeps import begin_sweep_run, process_sweep, sweep_heartbeat
+from .player import SPLITS
 
 class DevCommands(commands.Cog):
     def __init__(self, bot):
@@ -33,9 +28,9 @@ class DevCommands(commands.Cog):
         try:
             await ctx.defer(ephemeral=True)
 
-            # Fetch all team roles from the database without using await
-            team_role_docs = list(dbInfo.team_collection.find({}, {"team_id": 1, "_id": 0}))
-            team_role_ids = [doc["team_id"] for doc in team_role_docs]  # Extract role IDs
+            # Fetch all team roles from the team directory
+            team_role_docs = await dbInfo.team_directory.all()
+            team_role_ids = [doc["team_id"] for doc in team_role_docs if "team_id" in doc]  # Extract role IDs
 
             if not team_role_ids:
                 await ctx.respond("No team roles found in the database.", ephemeral=True)
@@ -130,11 +125,12 @@ class DevCommands(commands.Cog):
             await ctx.defer()
             guild = ctx.guild
 
+            players = await dbInfo.get_players_by_discord_id(dbInfo.TEAM_FIELDS)
             for member in guild.members:
                 if member.bot:
                     continue
 
-                player_info = dbInfo.player_collection.find_one({"discord_id": member.id})
+                player_info = players.get(member.id)
                 team_code = player_info.get("team", "Unassigned") if player_info else "Unassigned"
                 is_free_agent = 'Free Agent' in [role.name for role in member.roles]
 
@@ -187,8 +183,9 @@ class DevCommands(commands.Cog):
                 return
             
             # Fetch all team codes and roles from the database
-            team_data = list(dbInfo.team_collection.find({}))  # Fetch all team documents
+            team_data = await dbInfo.team_directory.all()  # Fetch all team documents
             team_roles = {team["team_code"]: guild.get_role(team["team_id"]) for team in team_data if "team_id" in team}
+            players = await dbInfo.get_players_by_discord_id(dbInfo.TEAM_FIELDS)
 
             for member in guild.members:
                 if member.bot:
@@ -197,7 +194,7 @@ class DevCommands(commands.Cog):
                 if any(role.name in roles_to_preserve for role in member.roles):
                     continue
 
-                player_entry = dbInfo.player_collection.find_one({"discord_id": member.id})
+                player_entry = players.get(member.id)
                 if not player_entry:
                     continue
 
@@ -211,7 +208,7 @@ class DevCommands(commands.Cog):
                     except Exception as e:
                         self.bot.logger.error(f"Error removing role {team_role.name} from {member.name}: {e}")
 
-                dbInfo.player_collection.update_one(
+                await dbInfo.player_collection.update_one(
                     {"discord_id": member.id},
                     {"$set": {"team": "FA", "active_roster": False}}
                 )    
@@ -237,7 +234,7 @@ class DevCommands(commands.Cog):
         try:
             await ctx.defer()
 
-            dbInfo.player_collection.update_many(
+            await dbInfo.player_collection.update_many(
                 {"eligible_for_split": True},
                 {"$set": {"eligible_for_split": False}}
             )
@@ -253,7 +250,7 @@ class DevCommands(commands.Cog):
     async def dev_flush_peaks(self, ctx):
         try:
             await ctx.defer()
-            flush_peaks = dbInfo.player_collection.update_many(
+            flush_peaks = await dbInfo.player_collection.update_many(
                 {},
                 {"$unset": {"peak_rank": ""}}
             )
@@ -270,12 +267,13 @@ class DevCommands(commands.Cog):
         discord_id = user.id
 
         # Clear split counts for user
-        dbInfo.player_collection.update_one(
+        await dbInfo.player_collection.update_one(
             {"discord_id": discord_id},
              {"$set": {
                  "summer_split_game_count": 0,
                  "fall_split_game_count": 0
-             }}
+             },
+             "$unset": {"match_tracking": ""}}
         )
 
         self.bot.logger.info(f"Cleared split counts for user: {user.name} ({discord_id})")
@@ -289,23 +287,16 @@ class DevCommands(commands.Cog):
         # Step 1: Fetch all active players who are playing
         try:
             # Fetch all players who have not left the server
-            active_players_cursor = dbInfo.player_collection.find({"left_at": None})
-            active_players = list(active_players_cursor)
+            active_players = await dbInfo.get_sweep_players()
         except Exception as e:
             self.bot.logger.error(f"Error fetching active players: {e}")
             await ctx.respond("Error fetching active players.", ephemeral=True)
             return
 
-        total_players = len(active_players)
-        processed_players = 0
-        errors = 0
-
         # Prepare a set of Discord IDs of players who are currently playing
         try:
             # Fetch all playing intents where 'Playing' is True
-            intents_cursor = dbInfo.intent_collection.find({"Playing": True})
-            intents = list(intents_cursor)
-            playing_discord_ids = set(intent['id'] for intent in intents)  # 'id' field in intent_collection
+            playing_discord_ids = set(await dbInfo.get_playing_ids(True, "id"))  # 'id' field in intent_collection
         except Exception as e:
             self.bot.logger.error(f"Error fetching intents: {e}")
             await ctx.respond("Error fetching intents.", ephemeral=True)
@@ -314,177 +305,112 @@ class DevCommands(commands.Cog):
         # Filter active players to include only those who are playing
         players_to_process = [player for player in active_players if player['discord_id'] in playing_discord_ids]
 
-        total_players_to_process = len(players_to_process)
-
-        # Step 2: Loop through each player
-        for player_record in players_to_process:
-            discord_id = player_record['discord_id']
-            try:
-                self.bot.logger.info(f"Running debug split check for player: {player_record['name']}")
-
-                # Fetch existing split game counts
-                summer_split_game_count = player_record.get('summer_split_game_count', 0)
-                fall_split_game_count = player_record.get('fall_split_game_count', 0)
-
-                # Fetch PUUID
-                puuid = player_record.get('puuid')
-
-                if not puuid:
-                    if not player_record.get('game_name') or not player_record.get('tag_line'):
-                        self.bot.logger.warning(f"Missing game_name or tag_line for {player_record['name']}. Skipping split check.")
-                        continue
-
-                    # Fetch PUUID if not already stored
-                    try:
-                        puuid = await self.get_puuid(player_record['game_name'], player_record['tag_line'])
-                        if not puuid:
-                            self.bot.logger.warning(f"Failed to retrieve PUUID for {player_record['name']}.")
-                            continue
-                        else:
-                            dbInfo.player_collection.update_one(
-                                {"discord_id": discord_id},
-                                {"$set": {"puuid": puuid}}
-                            )
-                    except Exception as e:
-                        self.bot.logger.error(f"Error fetching PUUID for {player_record['name']}: {e}")
-                        continue
-
-                # Get match history
-                try:
-                    # Adjusted fall_split_end to handle None value
-                    fall_split_end = SPLITS[2]["end"] or datetime.now(timezone.utc)
-                    match_history = await self.get_match_history(puuid, SPLITS[1]["start"], fall_split_end)
-                except Exception as e:
-                    self.bot.logger.error(f"Failed to retrieve match history for {player_record['name']}: {e}")
-                    continue
-
-                if not match_history:
-                    self.bot.logger.error(f"No match history found for {player_record['name']}")
-                    continue
+        player_cog = self.bot.get_cog("PlayerCog")
+        if player_cog is None:
+            self.bot.logger.error("Split check needs the player cog, which is not loaded.")
+            await ctx.respond("The player cog is not loaded, so the split check can't run.", ephemeral=True)
+            return
 
-                # Initialize counts for new games
-                new_summer_split_games = 0
-                new_fall_split_games = 0
+        # Resume an interrupted split check with the players it hadn't finished
+        run, players_to_process = await begin_sweep_run("split_check", players_to_process, self.bot.logger)
+        if run is None:
+            await ctx.respond("A split check is already running; check /sweep_progress.", ephemeral=True)
+            return
+        total_players_to_process = len(players_to_process)
 
-                # Process match history
-                for match_id in match_history:
-                    try:
-                        match_details = await self.get_match_details(match_id)
-                    except Exception as e:
-                        self.bot.logger.error(f"Error fetching match details for {match_id}: {e}")
-                        continue
+        # Step 2: Check players on the sweep workers, answering repeated lookups from the sweep memo
+        async def process(player_record):
+            return await self.split_check_player(player_cog, player_record)
 
-                    if not match_details:
-                        continue
+        with self.bot.riot.memoize() as memo, self.bot.riot.background(), sweep_heartbeat(run, self.bot.logger):
+            results = await process_sweep(run, players_to_process, process, self.bot.logger)
 
-                    # Get the queue ID
-                    queue_id = match_details['info'].get('queueId', 'Unknown Queue ID')
+        await dbInfo.finish_sweep_run(run['run_id'], results=results)
 
-                    # Only consider Solo/Duo games (queueId: 420)
-                    if queue_id != 420:
-                        continue
+        # Send summary back to the command invoker
+        await ctx.respond(
+            f"Debug split check completed for all playing users.\n"
+            f"Total Players: {total_players_to_process}\n"
+            f"Processed Players: {results['processed']}\n"
+            f"Errors: {results['errors']}\n"
+            f"Requeued: {results['requeued']}\n"
+            f"Riot Requests: {memo.issued} issued, {memo.saved} saved",
+            ephemeral=True
+        )
 
-                    # Get the game creation timestamp
-                    game_timestamp = match_details['info']['gameCreation'] / 1000
-                    game_date = datetime.fromtimestamp(game_timestamp, timezone.utc)
+    async def split_check_player(self, player_cog, player_record):
+        """Recount one player's split games. Returns True if their counts were updated.
 
-                    # Count games for the Summer Split
-                    if SPLITS[1]["start"] <= game_date <= SPLITS[1]["end"]:
-                        new_summer_split_games += 1
+        RiotUnavailableError is left to the sweep, which requeues the player.
+        """
+        discord_id = player_record['discord_id']
+        self.bot.logger.info(f"Running debug split check for player: {player_record['name']}")
 
-                    # Count games for the Fall Split
-                    if SPLITS[2]["start"] <= game_date <= fall_split_end:
-                        new_fall_split_games += 1
+        # Fetch PUUID
+        puuid = player_record.get('puuid')
 
-                # Update total game count
-                eligible_match_count = (summer_split_game_count + new_summer_split_games +
-                                        fall_split_game_count + new_fall_split_games)
+        if not puuid:
+            if not player_record.get('game_name') or not player_record.get('tag_line'):
+                self.bot.logger.warning(f"Missing game_name or tag_line for {player_record['name']}. Skipping split check.")
+                return False
 
-                self.bot.logger.info(f"Player: {player_record['name']}, Summer Split Games: {new_summer_split_games}, "
-                            f"Fall Split Games: {new_fall_split_games}, Total Games: {eligible_match_count}")
+            # Fetch PUUID if not already stored
+            try:
+                puuid = await self.get_puuid(player_record['game_name'], player_record['tag_line'])
+            except RiotUnavailableError:
+                raise
+            except Exception as e:
+                self.bot.logger.error(f"Error fetching PUUID for {player_record['name']}: {e}")
+                return False
+            if not puuid:
+                self.bot.logger.warning(f"Failed to retrieve PUUID for {player_record['name']}.")
+                return False
+            await dbInfo.player_collection.update_one(
+                {"discord_id": discord_id},
+                {"$set": {"puuid": puuid}}
+            )
 
-                # Update counts in the database
-                dbInfo.player_collection.update_one(
-                    {"discord_id": discord_id},
-                    {
-                        "$inc": {
-                            "summer_split_game_count": new_summer_split_games,
-                            "fall_split_game_count": new_fall_split_games,
-                            "eligible_match_count": new_summer_split_games + new_fall_split_games
-                        }
-                    }
-                )
+        # Count matches played since this PUUID's high-water mark
+        match_tracking = player_record.get('match_tracking', {})
+        try:
+            tracking = await player_cog.count_eligible_matches(puuid, match_tracking.get(puuid))
+        except RiotUnavailableError:
+            raise
+        except Exception as e:
+            self.bot.logger.error(f"Failed to retrieve match history for {player_record['name']}: {e}")
+            return False
 
-                processed_players += 1
+        if tracking is None:
+            self.bot.logger.error(f"No match history found for {player_record['name']}")
+            return False
 
-                # Optional: Add a delay to prevent hitting rate limits
-                await asyncio.sleep(1)  # Adjust as needed
+        # Running counts per split, including games counted by earlier runs
+        summer_split_game_count = tracking['split_counts'].get(SPLITS[1]["name"], 0)
+        fall_split_game_count = tracking['split_counts'].get(SPLITS[2]["name"], 0)
+        eligible_match_count = summer_split_game_count + fall_split_game_count
 
-            except Exception as e:
-                self.bot.logger.error(f"Error processing player {player_record['name']}: {e}")
-                errors += 1
-                continue
+        self.bot.logger.info(f"Player: {player_record['name']}, Summer Split Games: {summer_split_game_count}, "
+                    f"Fall Split Games: {fall_split_game_count}, Total Games: {eligible_match_count}")
 
-        # Send summary back to the command invoker
-        await ctx.respond(
-            f"Debug split check completed for all playing users.\n"
-            f"Total Players: {total_players_to_process}\n"
-            f"Processed Players: {processed_players}\n"
-            f"Errors: {errors}",
-            ephemeral=True
+        # Update counts in the database
+        await dbInfo.player_collection.update_one(
+            {"discord_id": discord_id},
+            {
+                "$set": {
+                    "summer_split_game_count": summer_split_game_count,
+                    "fall_split_game_count": fall_split_game_count,
+                    "eligible_match_count": eligible_match_count,
+                    f"match_tracking.{puuid}": tracking
+                }
+            }
         )
-
+        return True
 
     # Helper function to fetch PUUID
     async def get_puuid(self, game_name, tag_line):
         """Get PUUID for the given game_name and tag_line."""
-        url = f"https://americas.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"
-        headers = {'X-Riot-Token': config.RIOT_API}
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    account_info = await response.json()
-                    return account_info.get('puuid')
-                else:
-                    self.bot.logger.error(f"Error fetching PUUID for {game_name}#{tag_line}: {await response.text()}")
-                    return None
-
-    # Helper function to fetch match history
-    async def get_match_history(self, puuid):
-        """Get match history for the current and last split."""
-        url = f"https://americas.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids"
-        headers = {'X-Riot-Token': config.RIOT_API}
-        summer_split_start = int(SPLITS[1]["start"].timestamp())
-        params = {
-            "startTime": summer_split_start,  # Get matches starting from the Summer Split
-            "type": "ranked",
-            "count": 100  # Retrieve more matches if necessary
-        }
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers, params=params) as response:
-                if response.status == 200:
-                    match_ids = await response.json()
-                    self.bot.logger.info(f"Retrieved match IDs for PUUID {puuid}: {match_ids}")
-                    return match_ids
-                else:
-                    self.bot.logger.error(f"Error fetching match history for PUUID {puuid}: {await response.text()}")
-                    return None
-
-    # Helper function to fetch match details
-    async def get_match_details(self, match_id):
-        """Get the details of a specific match by match ID."""
-        url = f"https://americas.api.riotgames.com/lol/match/v5/matches/{match_id}"
-        headers = {'X-Riot-Token': config.RIOT_API}
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    match_details = await response.json()
-                    return match_details
-                else:
-                    self.bot.logger.error(f"Error fetching match details for match ID {match_id}: {await response.text()}")
-                    return None
+        account_info = await self.bot.riot.get_account(game_name, tag_line)
+        return account_info.get('puuid') if account_info else None
 
 def setup(bot):
     bot.add_cog(DevCommands(bot))
\ No newline at end of file
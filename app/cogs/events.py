@@ -5,6 +5,7 @@ import logging
 from discord.ext import commands
 from datetime import datetime
 import pytz
+from pymongo import UpdateMany, UpdateOne
 
 class EventsCog(commands.Cog):
     def __init__(self, bot):
@@ -17,38 +18,54 @@ class EventsCog(commands.Cog):
             guild = self.bot.get_guild(config.lol_server)  # Get the guild (server) object
             server_members = {member.id for member in guild.members if not member.bot}  # Get current members' IDs
             
-            # Get all members from the database
-            db_members = dbInfo.player_collection.find({"left_at": None}, {"discord_id": 1})  # Fetch all members without 'left_at'
-            db_member_ids = {member["discord_id"] for member in db_members}
-
-            # Find the members who are in the database but not in the server anymore
-            missing_members = db_member_ids - server_members
-
+            # One projected read of every stored member, diffed against the guild in memory.
+            # Player documents without a discord_id would all collapse onto the None key, so they are left out.
+            db_members = {
+                member["discord_id"]: member
+                async for member in dbInfo.player_collection.find({"discord_id": {"$ne": None}},
+                                                                  {"_id": 0, "discord_id": 1, "name": 1, "avatar_url": 1, "left_at": 1})
+            }
+            operations = []
+
+            # Members in the database but not in the server anymore are marked as left
+            missing_members = [discord_id for discord_id, member in db_members.items()
+                               if member.get("left_at") is None and discord_id not in server_members]
             if missing_members:
-                # Update the 'left_at' field for all missing members
                 left_date = datetime.now(pytz.utc).strftime('%m-%d-%Y')
-                dbInfo.player_collection.update_many(
-                    {"discord_id": {"$in": list(missing_members)}},
-                    {"$set": {"left_at": left_date}}
-                )
-                self.bot.logger.info(f"Marked {len(missing_members)} members as left in the database.")
-            else:
-                self.bot.logger.info("No missing members found during reverse sync.")
-            
-            # Add or update members who are still in the server
+                operations.append(UpdateMany({"discord_id": {"$in": missing_members}}, {"$set": {"left_at": left_date}}))
+
+            # Add new members and update names or avatars that changed
+            new_members = updated_members = 0
             for member in guild.members:
-                if not member.bot:
-                    avatar_url = str(member.avatar.url if member.avatar else member.default_avatar.url)
-                    self.add_member_to_db(member, avatar_url)
-            
+                if member.bot:
+                    continue
+                avatar_url = str(member.avatar.url if member.avatar else member.default_avatar.url)
+                existing_member = db_members.get(member.id)
+                if existing_member is None:
+                    new_members += 1
+                elif existing_member.get("name") == member.name and existing_member.get("avatar_url") == avatar_url:
+                    continue
+                else:
+                    updated_members += 1
+                operations.append(UpdateOne(
+                    {"discord_id": member.id},
+                    {"$set": {"name": member.name, "avatar_url": avatar_url},
+                     "$setOnInsert": {"team": None, "rank": None, "joined_at": datetime.now(pytz.utc).strftime('%m-%d-%Y'), "left_at": None}},
+                    upsert=True
+                ))
+
+            if operations:
+                await dbInfo.player_collection.bulk_write(operations, ordered=False)
+            self.bot.logger.info(f"Member reconciliation: {len(missing_members)} marked as left, {new_members} added, {updated_members} updated.")
+
             self.bot.logger.info("Bot is ready and members have been checked and added to database.")
             self.is_ready = True
 
-    def add_member_to_db(self, member, avatar_url):
-        existing_member = dbInfo.player_collection.find_one({"discord_id": member.id})
+    async def add_member_to_db(self, member, avatar_url):
+        existing_member = await dbInfo.get_player(member.id)
         if existing_member is None:
             # Add new member(s) to database
-            dbInfo.player_collection.insert_one({
+            await dbInfo.player_collection.insert_one({
                 "discord_id": member.id,
                 "name": member.name,
                 "team": None,
@@ -60,7 +77,7 @@ class EventsCog(commands.Cog):
             self.bot.logger.info(f"Added {member.name} ({member.id}) to database.")
         else:
             # Update the member's name and avatar in case they changed
-            dbInfo.player_collection.update_one(
+            await dbInfo.player_collection.update_one(
                 {"discord_id": member.id},
                 {"$set": {"name": member.name, "avatar_url": avatar_url}}
             )
@@ -74,17 +91,17 @@ class EventsCog(commands.Cog):
         self.bot.logger.info(f"New member joined: {member.name} ({member.id}). Adding to database.")
         avatar_url = str(member.avatar.url if member.avatar else member.default_avatar.url)
 
-        existing_member = dbInfo.player_collection.find_one({"discord_id": member.id})
+        existing_member = await dbInfo.get_player(member.id)
         if existing_member:
             # Clear the left_at field if it exists (i.e. member rejoined)
-            dbInfo.player_collection.update_one(
+            await dbInfo.player_collection.update_one(
                 {"discord_id": member.id},
                 {"$set": {"left_at": None, "avatar_url": avatar_url}}
             )
             self.bot.logger.info(f"Cleared 'left_at' date for returning member: {member.name} ({member.id})")
         else:
             # Add the new member to the database
-            self.add_member_to_db(member, avatar_url)
+            await self.add_member_to_db(member, avatar_url)
 
         # Assign "Missing Intent Form" role to new member
         await self.assign_role(member, "Missing Intent Form")
@@ -99,7 +116,7 @@ class EventsCog(commands.Cog):
             return
         
         left_date = datetime.now(pytz.utc).strftime('%m-%d-%Y')
-        dbInfo.player_collection.update_one(
+        await dbInfo.player_collection.update_one(
             {"discord_id": member.id},
             {"$set": {"left_at": left_date, "team": None}},
             upsert=True
@@ -107,7 +124,7 @@ class EventsCog(commands.Cog):
 
         self.bot.logger.info(f"Updated {member.name} ({member.id}) in the database with the date they left: {left_date}")
 
-        dbInfo.intent_collection.find_one_and_delete(
+        await dbInfo.intent_collection.find_one_and_delete(
             {"ID": member.id}
         )
 
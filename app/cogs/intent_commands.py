@@ -17,8 +17,8 @@ class IntentCommands(commands.Cog):
         if guild.id == config.lol_server:
             missing_intent_role = "Missing Intent Form"
             prefix = "**UR LoL Intent Stats**\n"
-            intent_playing = dbInfo.intent_collection.count_documents({"Playing": "Yes"})
-            intent_not_playing = dbInfo.intent_collection.count_documents({"Playing": "No"})
+            intent_playing = await dbInfo.intent_collection.count_documents({"Playing": "Yes"})
+            intent_not_playing = await dbInfo.intent_collection.count_documents({"Playing": "No"})
         
         role = get(guild.roles, name=missing_intent_role)
         users_with_role = [m for m in guild.members if role in m.roles]
@@ -1,13 +1,14 @@
 import asyncio
-import aiohttp
 import discord
 import logging
 import pytz
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import config
 import dbInfo
 from discord.ext import commands, tasks
 from discord.commands import Option
+from utils.riot_client import RiotUnavailableError
+from utils.sweeps import begin_sweep_run, process_sweep, sweep_heartbeat
 
 # Split dates for 2024
 SPLITS = [
@@ -19,6 +20,34 @@ SPLITS = [
 # Define required game count for eligibility
 REQUIRED_GAME_COUNT = 30
 
+# Count eligible matches from match IDs alone, using Riot's server-side queue and time filters
+COUNT_MATCH_IDS_ONLY = True
+
+# Matches newer than this are left for the next run so games still being played aren't missed
+MATCH_SETTLE_SECONDS = 3600
+
+# Match IDs returned per page by match-v5
+MATCH_ID_PAGE_SIZE = 100
+
+# How long a resolved Riot ID is trusted before it is looked up again
+RIOT_ACCOUNT_TTL = timedelta(days=7)
+
+# Accounts resolved without a summoner ID (e.g. a failed summoner lookup) are retried after this instead
+RIOT_ACCOUNT_RETRY_TTL = timedelta(hours=1)
+
+def normalize_riot_id(game_name, tag_line):
+    """Riot IDs are case-insensitive, so cache them under one spelling."""
+    return f"{game_name.strip()}#{tag_line.strip()}".casefold()
+
+def summarize_match(match):
+    """Reduce a match-v5 match to the fields the eligibility checks use."""
+    return {
+        "match_id": match['metadata']['matchId'],
+        "queue_id": match['info'].get('queueId'),
+        "game_creation": match['info'].get('gameCreation'),
+        "participants": match['metadata'].get('participants', [])
+    }
+
 class PlayerCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -61,98 +90,137 @@ class PlayerCog(commands.Cog):
     @commands.has_role("Bot Guy")
     async def dev_check_players(self, ctx):
         await ctx.defer(ephemeral=True)
-        await self.update_ranks_and_check()
+        if not await self.update_ranks_and_check():
+            return await ctx.respond("A rank and eligibility sweep is already running; check /sweep_progress.", ephemeral=True)
         await ctx.respond("Updated ranks and checked eligibility for all players.", ephemeral=True)
 
     async def update_ranks_and_check(self):
+        """Refresh ranks and eligibility for every playing member.
+
+        Returns False without doing anything if another ranks sweep is live.
+        """
         self.bot.logger.info("Updating ranks and checking eligibility for all players.")
 
         # Fetch all active players who have not left the server
         try:
-            active_players_cursor = dbInfo.player_collection.find({"left_at": None})
-            active_players = list(active_players_cursor)
+            active_players = await dbInfo.get_sweep_players()
         except Exception as e:
             self.bot.logger.error(f"Error fetching active players: {e}")
-            return
+            return True
 
         # Fetch intents where 'Playing': 'Yes'
         try:
-            intents_cursor = dbInfo.intent_collection.find({"Playing": "Yes"})
-            intents = list(intents_cursor)
-            playing_discord_ids = set(intent['ID'] for intent in intents)  # Adjust 'ID' if necessary
+            playing_discord_ids = set(await dbInfo.get_playing_ids())
         except Exception as e:
             self.bot.logger.error(f"Error fetching intents: {e}")
-            return
+            return True
 
         # Filter active players to include only those who are playing
         players_to_process = [player for player in active_players if player['discord_id'] in playing_discord_ids]
 
+        # Resume an interrupted sweep with the players it hadn't finished
+        run, players_to_process = await begin_sweep_run("ranks", players_to_process, self.bot.logger)
+        if run is None:
+            return False
+
         total_players = len(players_to_process)
-        processed_players = 0
-        errors = 0
-
-        for player_record in players_to_process:
-            discord_id = player_record['discord_id']
-            try:
-                self.bot.logger.info(f"Processing player: {player_record.get('name')}")
-                eligible_for_split = player_record.get('eligible_for_split', False)
-                if eligible_for_split:
-                    self.bot.logger.info(f"Player {player_record['name']} is already eligible for the current split. Skipping.")
-                    continue
-
-                # Process player and alt accounts to get highest rank
-                highest_rank_info = await self.process_player_and_alts(player_record)
-                if highest_rank_info is None:
-                    continue  # Skip to next player if failed to get rank info
-
-                # Update rank info
-                dbInfo.player_collection.update_one(
-                    {"discord_id": discord_id},
-                    {"$set": {
-                        "rank_info": highest_rank_info['rank_info'],
-                        "last_updated": datetime.now(pytz.utc).strftime('%m-%d-%Y'),
-                        "highest_account_type": highest_rank_info['account_type'],
-                    }}
-                )
-                self.bot.logger.info(f"Updated rank information for player {player_record['name']} from their {highest_rank_info['account_type']} account.")
-
-                # Collect PUUIDs from main and alt accounts
-                puuids = await self.collect_puuids(player_record)
-                if not puuids:
-                    self.bot.logger.warning(f"No valid PUUIDs found for player {player_record['name']}. Skipping eligibility check.")
-                    continue
-
-                # Get eligible matches from all PUUIDs
-                total_eligible_matches = 0
-                for puuid in puuids:
-                    eligible_matches = await self.get_match_history(puuid)
-                    total_eligible_matches += eligible_matches
-
-                # Update eligible match count
-                if total_eligible_matches >= REQUIRED_GAME_COUNT:
-                    self.bot.logger.info(f"Player {player_record['name']} has reached eligibility with {total_eligible_matches} matches.")
-                    dbInfo.player_collection.update_one(
-                        {"discord_id": discord_id},
-                        {"$set": {"eligible_for_split": True, "eligible_match_count": total_eligible_matches}}
-                    )
-                else:
-                    self.bot.logger.info(f"Player {player_record['name']} has {total_eligible_matches} eligible matches.")
-                    dbInfo.player_collection.update_one(
-                        {"discord_id": discord_id},
-                        {"$set": {"eligible_match_count": total_eligible_matches}}
-                    )
-
-                processed_players += 1
-
-                # Optional delay to prevent rate limiting
-                await asyncio.sleep(1)
-
-            except Exception as e:
-                self.bot.logger.error(f"Error processing player {player_record['name']}: {e}")
-                errors += 1
+
+        async def process(player_record):
+            return await self.refresh_player(player_record) == "updated"
+
+        # Lookups repeated within the sweep are answered from the memo, and staff lookups go ahead of the sweep
+        with self.bot.riot.memoize() as memo, self.bot.riot.background(), sweep_heartbeat(run, self.bot.logger):
+            results = await process_sweep(run, players_to_process, process, self.bot.logger)
+
+        await dbInfo.finish_sweep_run(run['run_id'], results=results)
+        self.bot.logger.info(f"Rank and eligibility update completed. Total players: {total_players}, Processed: {results['processed']}, Errors: {results['errors']}, Requeued: {results['requeued']}, "
+                             f"Riot requests issued: {memo.issued}, saved: {memo.saved}")
+        return True
+
+    @commands.slash_command(guild_ids=[config.lol_server], description="Show progress of the latest rank and split check sweeps")
+    @commands.has_any_role("Bot Guy", "League Ops", "Commissioner", "Owner")
+    async def sweep_progress(self, ctx):
+        lines = []
+        for kind, label in (("ranks", "Rank and eligibility"), ("split_check", "Split check")):
+            run = await dbInfo.get_latest_sweep_run(kind)
+            if not run:
+                lines.append(f"**{label}:** no runs recorded")
                 continue
 
-        self.bot.logger.info(f"Rank and eligibility update completed. Total players: {total_players}, Processed: {processed_players}, Errors: {errors}")
+            done = len(run['completed_ids'])
+            total = len(run['player_ids'])
+            started_at = run['started_at'].replace(tzinfo=timezone.utc)
+            line = f"**{label}:** {run['status']} - {done}/{total} players (run `{run['run_id'][:8]}`, started <t:{int(started_at.timestamp())}:R>)"
+            if run['status'] == "running" and done:
+                elapsed = datetime.now(timezone.utc) - started_at
+                remaining = elapsed / done * (total - done)
+                line += f", about {int(remaining.total_seconds() // 60)} min left"
+            lines.append(line)
+
+        await ctx.respond("\n".join(lines), ephemeral=True)
+
+    async def refresh_player(self, player_record):
+        """Update rank info and eligible match count for a single player.
+
+        Returns "already_eligible", "no_rank", "no_puuids" or "updated".
+        """
+        discord_id = player_record['discord_id']
+        self.bot.logger.info(f"Processing player: {player_record.get('name')}")
+
+        eligible_for_split = player_record.get('eligible_for_split', False)
+        if eligible_for_split:
+            self.bot.logger.info(f"Player {player_record['name']} is already eligible for the current split. Skipping.")
+            return "already_eligible"
+
+        # Process player and alt accounts to get highest rank
+        highest_rank_info = await self.process_player_and_alts(player_record)
+        if highest_rank_info is None:
+            return "no_rank"
+
+        # Update rank info
+        await dbInfo.player_collection.update_one(
+            {"discord_id": discord_id},
+            {"$set": {
+                "rank_info": highest_rank_info['rank_info'],
+                "last_updated": datetime.now(pytz.utc).strftime('%m-%d-%Y'),
+                "highest_account_type": highest_rank_info['account_type'],
+            }}
+        )
+        self.bot.logger.info(f"Updated rank information for player {player_record['name']} from their {highest_rank_info['account_type']} account.")
+
+        # Collect PUUIDs from main and alt accounts
+        puuids = await self.collect_puuids(player_record)
+        if not puuids:
+            self.bot.logger.warning(f"No valid PUUIDs found for player {player_record['name']}. Skipping eligibility check.")
+            return "no_puuids"
+
+        # Add matches played since the last check to each PUUID's running counts
+        match_tracking = player_record.get('match_tracking', {})
+        total_eligible_matches = 0
+        tracking_updates = {}
+        for puuid in puuids:
+            tracking = await self.count_eligible_matches(puuid, match_tracking.get(puuid))
+            if tracking is None:
+                tracking = match_tracking.get(puuid, {})
+            else:
+                tracking_updates[f"match_tracking.{puuid}"] = tracking
+            total_eligible_matches += self.count_tracked_matches(tracking)
+
+        # Update eligible match count
+        if total_eligible_matches >= REQUIRED_GAME_COUNT:
+            self.bot.logger.info(f"Player {player_record['name']} has reached eligibility with {total_eligible_matches} matches.")
+            await dbInfo.player_collection.update_one(
+                {"discord_id": discord_id},
+                {"$set": {"eligible_for_split": True, "eligible_match_count": total_eligible_matches, **tracking_updates}}
+            )
+        else:
+            self.bot.logger.info(f"Player {player_record['name']} has {total_eligible_matches} eligible matches.")
+            await dbInfo.player_collection.update_one(
+                {"discord_id": discord_id},
+                {"$set": {"eligible_match_count": total_eligible_matches, **tracking_updates}}
+            )
+
+        return "updated"
 
     @commands.slash_command(guild_ids=[config.lol_server], description="Update player rank and check eligibility for a single user")
     @commands.has_role("Bot Guy")
@@ -161,83 +229,82 @@ class PlayerCog(commands.Cog):
             await ctx.defer(ephemeral=True)
 
             # Find the player by name in the database
-            player_record = dbInfo.player_collection.find_one({"discord_id": player_name.id, "left_at": None})
+            player_record = await dbInfo.player_collection.find_one({"discord_id": player_name.id, "left_at": None})
 
             if not player_record:
                 await ctx.respond(f"Player '{player_name.display_name}' not found or has left the server.", ephemeral=True)
                 return
 
-            self.bot.logger.info(f"Processing player: {player_record['name']}")
+            result = await self.refresh_player(player_record)
 
-            eligible_for_split = player_record.get('eligible_for_split', False)
-            if eligible_for_split:
-                self.bot.logger.info(f"Player {player_record['name']} is already eligible for the current split.")
+            if result == "already_eligible":
                 await ctx.respond(f"Player '{player_name.display_name}' is already eligible for the current split.", ephemeral=True)
-                return
-
-            # Process player and alt accounts to get highest rank
-            highest_rank_info = await self.process_player_and_alts(player_record)
-            if highest_rank_info is None:
+            elif result == "no_rank":
                 await ctx.respond(f"Failed to retrieve rank information for '{player_name.display_name}'.", ephemeral=True)
-                return
-
-            # Update rank info
-            dbInfo.player_collection.update_one(
-                {"discord_id": player_record['discord_id']},
-                {"$set": {
-                    "rank_info": highest_rank_info['rank_info'],
-                    "last_updated": datetime.now(pytz.utc).strftime('%m-%d-%Y'),
-                    "highest_account_type": highest_rank_info['account_type'],
-                }}
-            )
-
-            self.bot.logger.info(f"Updated rank information for player {player_record['name']} from their {highest_rank_info['account_type']} account.")
-
-            # Collect PUUIDs from main and alt accounts
-            puuids = await self.collect_puuids(player_record)
-            if not puuids:
+            elif result == "no_puuids":
                 await ctx.respond(f"No valid PUUIDs found for '{player_name.display_name}'.", ephemeral=True)
-                return
-
-            # Get eligible matches from all PUUIDs
-            total_eligible_matches = 0
-            for puuid in puuids:
-                eligible_matches = await self.get_match_history(puuid)
-                total_eligible_matches += eligible_matches
-
-            # Update eligible match count
-            if total_eligible_matches >= REQUIRED_GAME_COUNT:
-                self.bot.logger.info(f"Player {player_record['name']} has reached eligibility with {total_eligible_matches} matches.")
-                dbInfo.player_collection.update_one(
-                    {"discord_id": player_record['discord_id']},
-                    {"$set": {"eligible_for_split": True, "eligible_match_count": total_eligible_matches}}
-                )
             else:
-                self.bot.logger.info(f"Player {player_record['name']} has {total_eligible_matches} eligible matches.")
-                dbInfo.player_collection.update_one(
-                    {"discord_id": player_record['discord_id']},
-                    {"$set": {"eligible_match_count": total_eligible_matches}}
-                )
-
-            await ctx.respond(f"Rank and eligibility check completed for '{player_name.display_name}'.", ephemeral=True)
+                await ctx.respond(f"Rank and eligibility check completed for '{player_name.display_name}'.", ephemeral=True)
 
         except Exception as e:
             await ctx.respond(f"There was an error processing {player_name}")
             self.bot.logger.error(f"Error processing ranks for {player_name}: {e}")
 
+    async def get_main_puuid(self, player_record):
+        """Get the main account's PUUID, resolving and storing it if it isn't known yet."""
+        main_puuid = player_record.get('puuid')
+        if not main_puuid and player_record.get('game_name') and player_record.get('tag_line'):
+            main_account = await self.resolve_account(player_record['game_name'], player_record['tag_line'])
+            if main_account:
+                main_puuid = main_account['puuid']
+                player_record['puuid'] = main_puuid
+                await dbInfo.player_collection.update_one(
+                    {"discord_id": player_record['discord_id']},
+                    {"$set": {"puuid": main_puuid}}
+                )
+        return main_puuid
+
+    async def resolve_account(self, game_name, tag_line, refresh=False):
+        """Resolve a Riot ID to its PUUID and summoner ID through the Riot account cache.
+
+        Cached accounts are reused for RIOT_ACCOUNT_TTL, or RIOT_ACCOUNT_RETRY_TTL if
+        they have no summoner ID; `refresh` forces a new lookup.
+        """
+        riot_id = normalize_riot_id(game_name, tag_line)
+        cached_account = await dbInfo.get_riot_account(riot_id)
+        if cached_account and not refresh:
+            resolved_at = cached_account['resolved_at'].replace(tzinfo=timezone.utc)
+            ttl = RIOT_ACCOUNT_TTL if cached_account.get('summoner_id') else RIOT_ACCOUNT_RETRY_TTL
+            if datetime.now(timezone.utc) - resolved_at < ttl:
+                return cached_account
+
+        try:
+            puuid = await self.get_puuid(game_name, tag_line)
+        except RiotUnavailableError:
+            # Fall back to the last known account if Riot can't be reached
+            if cached_account:
+                return cached_account
+            raise
+        if not puuid:
+            return cached_account
+
+        account = {
+            "riot_id": riot_id,
+            "game_name": game_name,
+            "tag_line": tag_line,
+            "puuid": puuid,
+            "summoner_id": await self.get_summoner_id(puuid),
+            "resolved_at": datetime.now(timezone.utc)
+        }
+        await dbInfo.save_riot_account(account)
+        return account
+
     async def collect_puuids(self, player_record):
         """Collect PUUIDs from main and alt accounts."""
         puuids = []
 
         # Main account
-        main_puuid = player_record.get('puuid')
-        if not main_puuid:
-            main_puuid = await self.get_puuid(player_record['game_name'], player_record['tag_line'])
-            if main_puuid:
-                dbInfo.player_collection.update_one(
-                    {"discord_id": player_record['discord_id']},
-                    {"$set": {"puuid": main_puuid}}
-                )
+        main_puuid = await self.get_main_puuid(player_record)
         if main_puuid:
             puuids.append(main_puuid)
         else:
@@ -246,9 +313,9 @@ class PlayerCog(commands.Cog):
         # Alt accounts
         alt_accounts = player_record.get('alt_accounts', [])
         for alt in alt_accounts:
-            alt_puuid = await self.get_puuid(alt['game_name'], alt['tag_line'])
-            if alt_puuid:
-                puuids.append(alt_puuid)
+            alt_account = await self.resolve_account(alt['game_name'], alt['tag_line'])
+            if alt_account:
+                puuids.append(alt_account['puuid'])
             else:
                 self.bot.logger.warning(f"Failed to retrieve PUUID for alt {alt['game_name']}#{alt['tag_line']}.")
 
@@ -272,14 +339,7 @@ class PlayerCog(commands.Cog):
         }
 
         # Process main account
-        main_puuid = player_record.get('puuid')
-        if not main_puuid:
-            main_puuid = await self.get_puuid(player_record['game_name'], player_record['tag_line'])
-            if main_puuid:
-                dbInfo.player_collection.update_one(
-                    {"discord_id": player_record['discord_id']},
-                    {"$set": {"puuid": main_puuid}}
-                )
+        main_puuid = await self.get_main_puuid(player_record)
         if main_puuid:
             summoner_id = await self.get_summoner_id(main_puuid)
             if summoner_id:
@@ -303,12 +363,12 @@ class PlayerCog(commands.Cog):
         # Process alt accounts
         alt_accounts = player_record.get('alt_accounts', [])
         for alt in alt_accounts:
-            alt_puuid = await self.get_puuid(alt['game_name'], alt['tag_line'])
-            if not alt_puuid:
+            alt_account = await self.resolve_account(alt['game_name'], alt['tag_line'])
+            if not alt_account:
                 self.bot.logger.warning(f"Failed to retrieve PUUID for alt {alt['game_name']}#{alt['tag_line']}. Skipping.")
                 continue
 
-            alt_summoner_id = await self.get_summoner_id(alt_puuid)
+            alt_summoner_id = alt_account.get('summoner_id')
             if not alt_summoner_id:
                 self.bot.logger.warning(f"Failed to retrieve Summoner ID for alt {alt['game_name']}#{alt['tag_line']}. Skipping.")
                 continue
@@ -330,135 +390,160 @@ class PlayerCog(commands.Cog):
             self.bot.logger.error(f"Failed to retrieve rank information for {player_record['name']} from any account.")
         return highest_rank_info
 
-    async def get_match_history(self, puuid):
-        """Get number of eligible matches for a given PUUID."""
-        url = f"https://americas.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids"
-        headers = {'X-Riot-Token': config.RIOT_API}
+    async def count_eligible_matches(self, puuid, tracking=None):
+        """Add matches played since the PUUID's high-water mark to its running counts.
+
+        `tracking` is the PUUID's entry in the player's match_tracking field:
+        the time (ms) matches have been counted through and the count per split.
+        Returns the updated entry, or None if the new matches could not all be read.
+        """
+        tracking = tracking or {"counted_through": 0, "split_counts": {}}
+        if COUNT_MATCH_IDS_ONLY:
+            return await self.count_match_ids(puuid, tracking)
+        return await self.get_match_history(puuid, tracking)
+
+    async def count_match_ids(self, puuid, tracking):
+        """Count eligible matches from match IDs, one windowed query per split.
+
+        Riot filters by queue and time window, so no match details are needed.
+        """
+        settled = datetime.now(timezone.utc) - timedelta(seconds=MATCH_SETTLE_SECONDS)
+        counted_through = tracking["counted_through"]
+        split_counts = dict(tracking["split_counts"])
+
+        for split in SPLITS[1:]:
+            start_time = max(int(split["start"].timestamp()), counted_through // 1000 + 1)
+            end_time = int(min(split["end"] or settled, settled).timestamp())
+            if start_time > end_time:
+                continue
+
+            match_ids = await self.get_match_ids(puuid, {"queue": 420, "startTime": start_time, "endTime": end_time})
+            if match_ids is None:
+                return None
+
+            split_counts[split["name"]] = split_counts.get(split["name"], 0) + len(match_ids)
+            counted_through = end_time * 1000
+
+        self.bot.logger.info(f"Eligible matches for PUUID {puuid} by split: {split_counts}")
+        return {"counted_through": counted_through, "split_counts": split_counts}
+
+    async def get_match_ids(self, puuid, params):
+        """Get every match ID matching the filters, paging with `start` until the window is exhausted."""
+        match_ids = []
+        while True:
+            page_params = {**params, "start": len(match_ids), "count": MATCH_ID_PAGE_SIZE}
+            page = await self.bot.riot.get_match_ids(puuid, **page_params)
+            if page is None:
+                return None
+            match_ids.extend(page)
+            if len(page) < MATCH_ID_PAGE_SIZE:
+                return match_ids
+
+    async def get_match_history(self, puuid, tracking):
+        """Count new eligible matches by reading each match's queue and creation time."""
         summer_split_start = int(SPLITS[1]["start"].timestamp())
         fall_split_end = SPLITS[2]["end"] or datetime.now(timezone.utc)
         fall_split_end_timestamp = int(fall_split_end.timestamp())
 
         params = {
-            "startTime": summer_split_start,
+            "startTime": max(summer_split_start, tracking["counted_through"] // 1000 + 1),
             "endTime": fall_split_end_timestamp,
-            "type": "ranked",
-            "count": 100
+            "type": "ranked"
         }
 
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, headers=headers, params=params) as response:
-                        if response.status == 200:
-                            match_ids = await response.json()
-                            if not match_ids:
-                                self.bot.logger.info(f"No matches found for PUUID {puuid} in the specified period.")
-                                return 0
-
-                            self.bot.logger.info(f"Retrieved {len(match_ids)} match IDs for PUUID {puuid}")
-
-                            eligible_count = 0
-                            for match_id in match_ids:
-                                match_details = await self.get_match_details(match_id)
-                                if match_details:
-                                    queue_id = match_details['info'].get('queueId')
-                                    if queue_id == 420:
-                                        game_creation = match_details['info'].get('gameCreation')
-                                        game_date = datetime.fromtimestamp(game_creation / 1000, tz=timezone.utc)
-                                        # Check if the match falls within the splits
-                                        if self.is_match_in_splits(game_date):
-                                            eligible_count += 1
-
-                            self.bot.logger.info(f"Total eligible matches for PUUID {puuid}: {eligible_count}")
-                            return eligible_count
-
-                        else:
-                            error_message = await response.text()
-                            if response.status == 429:
-                                self.bot.logger.error(f"Rate limited while fetching match history for {puuid}, attempt {attempt + 1}: {error_message}")
-                            else:
-                                self.bot.logger.error(f"Error fetching match history for PUUID {puuid}, attempt {attempt + 1}: {error_message}")
-
-                            await asyncio.sleep(2 ** attempt)
-            except Exception as e:
-                self.bot.logger.error(f"Exception occurred while fetching match history for PUUID {puuid}, attempt {attempt + 1}: {e}")
-
-        self.bot.logger.error(f"Failed to retrieve match history for PUUID {puuid} after {max_retries} attempts.")
-        return 0
-
-    def is_match_in_splits(self, game_date):
-        """Check if the game date falls within the defined splits."""
+        match_ids = await self.get_match_ids(puuid, params)
+        if match_ids is None:
+            return None
+
+        if not match_ids:
+            self.bot.logger.info(f"No new matches found for PUUID {puuid} in the specified period.")
+            return tracking
+
+        self.bot.logger.info(f"Retrieved {len(match_ids)} new match IDs for PUUID {puuid}")
+
+        counted_through = tracking["counted_through"]
+        split_counts = dict(tracking["split_counts"])
+        for match_id in match_ids:
+            match_details = await self.get_match_details(match_id)
+            if not match_details:
+                # Don't move the mark past a match that wasn't counted
+                self.bot.logger.error(f"Could not read match {match_id} for PUUID {puuid}. Keeping previous counts.")
+                return None
+
+            game_creation = match_details.get('game_creation')
+            counted_through = max(counted_through, game_creation)
+            if match_details.get('queue_id') == 420:
+                game_date = datetime.fromtimestamp(game_creation / 1000, tz=timezone.utc)
+                split_name = self.get_split_name(game_date)
+                if split_name:
+                    split_counts[split_name] = split_counts.get(split_name, 0) + 1
+
+        self.bot.logger.info(f"Eligible matches for PUUID {puuid} by split: {split_counts}")
+        return {"counted_through": counted_through, "split_counts": split_counts}
+
+    def get_split_name(self, game_date):
+        """Return the name of the split the game date falls within, if any."""
         for split in SPLITS:
             split_start = split['start']
             split_end = split['end'] or datetime.now(timezone.utc)
             if split_start <= game_date <= split_end:
-                return True
-        return False
+                return split['name']
+        return None
+
+    @staticmethod
+    def count_tracked_matches(tracking):
+        """Total eligible matches in a match_tracking entry for the current splits."""
+        split_names = {split['name'] for split in SPLITS}
+        return sum(count for name, count in tracking.get('split_counts', {}).items() if name in split_names)
 
     async def get_match_details(self, match_id):
-        """Get the details of a specific match by match ID."""
-        url = f"https://americas.api.riotgames.com/lol/match/v5/matches/{match_id}"
-        headers = {'X-Riot-Token': config.RIOT_API}
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    match_details = await response.json()
-                    return match_details
-                else:
-                    self.bot.logger.error(f"Error fetching match details for match ID {match_id}: {await response.text()}")
-                    return None
+        """Get the eligibility fields of a match, reading through the match details cache.
+
+        Finished matches never change, so each match is only requested from Riot once.
+        Within a sweep, players sharing a match also share one lookup of its summary.
+        """
+        async def load():
+            cached_details = await dbInfo.get_match_details(match_id)
+            if cached_details:
+                return cached_details
+
+            match = await self.bot.riot.get_match(match_id)
+            if match is None:
+                return None
+
+            match_details = summarize_match(match)
+            await dbInfo.save_match_details(match_details)
+            return match_details
+
+        return await self.bot.riot.memoized(("match_details", match_id), load)
 
     async def get_puuid(self, game_name, tag_line):
         """Get PUUID for the given game_name and tag_line."""
-        url = f"https://americas.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"
-        headers = {'X-Riot-Token': config.RIOT_API}
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    account_info = await response.json()
-                    return account_info.get('puuid')
-                else:
-                    self.bot.logger.error(f"Error fetching PUUID for {game_name}#{tag_line}: {await response.text()}")
-                    return None
+        account_info = await self.bot.riot.get_account(game_name, tag_line)
+        return account_info.get('puuid') if account_info else None
 
     async def get_summoner_id(self, puuid):
         """Get Summoner ID from PUUID."""
-        url = f"https://na1.api.riotgames.com/lol/summoner/v4/summoners/by-puuid/{puuid}"
-        headers = {'X-Riot-Token': config.RIOT_API}
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    summoner_info = await response.json()
-                    return summoner_info.get('id')
-                else:
-                    self.bot.logger.error(f"Error fetching Summoner ID for PUUID {puuid}: {await response.text()}")
-                    return None
+        summoner_info = await self.bot.riot.get_summoner(puuid)
+        return summoner_info.get('id') if summoner_info else None
 
     async def get_player_rank(self, summoner_id):
         """Get player's rank information."""
-        url = f"https://na1.api.riotgames.com/lol/league/v4/entries/by-summoner/{summoner_id}"
-        headers = {'X-Riot-Token': config.RIOT_API}
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    rank_info = await response.json()
-                    tier_division_info = []
-                    for entry in rank_info:
-                        tier = entry.get('tier')
-                        division = entry.get('rank')
-                        queue_type = entry.get('queueType')
-                        tier_division_info.append({
-                            "queue_type": queue_type,
-                            "tier": tier,
-                            "division": division
-                        })
-                    return tier_division_info
-                else:
-                    self.bot.logger.error(f"Error fetching rank info for Summoner ID {summoner_id}: {await response.text()}")
-                    return None
+        rank_info = await self.bot.riot.get_league_entries(summoner_id)
+        if rank_info is None:
+            return None
+
+        tier_division_info = []
+        for entry in rank_info:
+            tier = entry.get('tier')
+            division = entry.get('rank')
+            queue_type = entry.get('queueType')
+            tier_division_info.append({
+                "queue_type": queue_type,
+                "tier": tier,
+                "division": division
+            })
+        return tier_division_info
 
 def setup(bot):
     bot.add_cog(PlayerCog(bot))
\ No newline at end of file
@@ -21,14 +21,10 @@ class RankCog(commands.Cog):
         total_ranked_players = 0
 
         # Only select players who have not left the server and are playing
-        playing_players = dbInfo.intent_collection.find({"Playing": "Yes"})
-        playing_ids = [player['ID'] for player in playing_players]
+        playing_ids = await dbInfo.get_playing_ids()
         
         # Fetch players who have not left the server and are in previous list
-        players = dbInfo.player_collection.find({
-            "left_at": None,
-            "discord_id": {"$in": playing_ids}
-        })
+        players = await dbInfo.get_ranked_players(playing_ids)
         
 
         for player in players:
@@ -41,7 +41,7 @@ class RoleSelectionView(discord.ui.View):
 
         # Update the database with the new roles
         updated_roles = [role.name for role in (existing_roles + [new_role])]
-        dbInfo.player_collection.update_one(
+        await dbInfo.player_collection.update_one(
             {"discord_id": member.id},
             {"$set": {"in_game_roles": updated_roles}},  # Store both roles
             upsert=True
@@ -35,13 +35,14 @@ class Roster(commands.Cog):
         async for message in roster_channel.history(limit=10):
             await message.delete()
 
-        # Fetch all teams from team collection with logos (active teams)
-        teams = dbInfo.team_collection.find({"logo": {"$exists": True}}).sort("team_name", 1)
+        # Fetch all teams from team collection with logos (active teams); a team without a code has no roster to show
+        teams = sorted((team for team in await dbInfo.team_directory.all() if "logo" in team and team.get("team_code")),
+                       key=lambda team: team.get("team_name") or "")
 
         # Build embed for each team
         for team in teams:
-            team_name = team["team_name"]
             team_code = team["team_code"]
+            team_name = team.get("team_name") or team_code
             team_logo_path = team.get("logo", None)
             team_wins = team.get("wins", 0)
             team_losses = team.get("losses", 0)
@@ -58,7 +59,7 @@ class Roster(commands.Cog):
             team_logo_url = f"{base_logo_url}{team_logo_path}" if team_logo_path else ''
 
             # Fetch active roster players for this team (exclude reserves)
-            roster_list = dbInfo.player_collection.find({"team": team_code, "active_roster": True, "reserve_player": {"$ne": True}})
+            roster_list = await dbInfo.get_roster(team_code)
 
             player_slots = ['A', 'B', 'C', 'D', 'E']
 
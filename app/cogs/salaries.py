@@ -81,7 +81,7 @@ class SalaryCog(commands.Cog):
         try:
             await ctx.defer()
 
-            players = dbInfo.player_collection.find({"left_at": None, "salary": None})  # Only active players and those who don't have a salary already
+            players = await dbInfo.get_unsalaried_players()  # Only active players and those who don't have a salary already
             salary_report = []
             total_salary = 0
 
@@ -100,7 +100,7 @@ class SalaryCog(commands.Cog):
                     salary = self.calculate_salary(highest_rank, highest_division)
                     
                     # Store the calculated salary in the player's document
-                    dbInfo.player_collection.update_one(
+                    await dbInfo.player_collection.update_one(
                         {"discord_id": player['discord_id']},
                         {"$set": {"salary": salary, "salary_season": season_number}}
                     )
@@ -156,7 +156,7 @@ class SalaryCog(commands.Cog):
         """Command for staff to manually adjust a player's salary"""
         try:
             await ctx.defer()
-            player_data = dbInfo.player_collection.find_one({"discord_id": user.id})
+            player_data = await dbInfo.get_player(user.id)
 
             if not player_data:
                 return await ctx.respond(f"{user.mention} was not found in the database", ephemeral=True)
@@ -166,7 +166,7 @@ class SalaryCog(commands.Cog):
             if not current_salary:
                 return await ctx.respond(f"{user.mention} does not have a current salary and cannot be manually changed.", ephemeral=True)
 
-            dbInfo.player_collection.update_one(
+            await dbInfo.player_collection.update_one(
                 {"discord_id": user.id},
                 {"$set": {
                     "previous_salary": current_salary,
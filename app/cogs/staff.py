@@ -6,6 +6,7 @@ import dbInfo
 import config
 from urllib.parse import quote_plus
 from helper import update_nickname
+from utils.riot_client import RiotUnavailableError
 
 def get_peak_rank(player_info):
     RANK_ORDER = {
@@ -68,14 +69,14 @@ class StaffCog(commands.Cog):
             await ctx.defer()
 
             # Ensure team codes entered correctly
-            winning_team = dbInfo.team_collection.find_one({"team_code": win_team.upper()})
-            ffing_team = dbInfo.team_collection.find_one({"team_code": ff_team.upper()})
+            winning_team = await dbInfo.team_directory.get(win_team)
+            ffing_team = await dbInfo.team_directory.get(ff_team)
 
             if winning_team and ffing_team:
                 # Update winner record
-                dbInfo.team_collection.update_one({"team_code": win_team.upper()}, {"$inc": {"wins": 1}})
+                await dbInfo.team_directory.update(win_team, {"$inc": {"wins": 1}})
                 # Update loser record
-                dbInfo.team_collection.update_one({"team_code": ff_team.upper()}, {"$inc": {"losses": 1}})
+                await dbInfo.team_directory.update(ff_team, {"$inc": {"losses": 1}})
 
                 embed = discord.Embed(
                     title="Series Forfeit Processed",
@@ -104,11 +105,11 @@ class StaffCog(commands.Cog):
         fa_role = discord.utils.get(ctx.guild.roles, name="Free Agents")
         spect_role = discord.utils.get(ctx.guild.roles, name="Spectator")
 
-        user_info = dbInfo.intent_collection.find_one({"ID": user.id})
+        user_info = await dbInfo.intent_collection.find_one({"ID": user.id})
         try:
             if user_info:
                 if user_info.get("Playing") == "Yes":
-                    dbInfo.intent_collection.update_one(
+                    await dbInfo.intent_collection.update_one(
                         {"ID": user.id},
                         {"$set": {"Playing": "No"}}
                     )
@@ -142,7 +143,7 @@ class StaffCog(commands.Cog):
                 avatar_url = str(member.avatar.url if member.avatar else member.default_avatar.url)
 
                 # Update the player's document in the database with the avatar URL
-                dbInfo.player_collection.update_one(
+                await dbInfo.player_collection.update_one(
                     {"discord_id": member.id},
                     {"$set": {"avatar_url": avatar_url}},
                     upsert=True
@@ -159,7 +160,7 @@ class StaffCog(commands.Cog):
         await ctx.defer()
 
         # Fetch the player document based on the Discord user ID
-        player = dbInfo.player_collection.find_one({"discord_id": user.id})
+        player = await dbInfo.get_player(user.id)
 
         if not player:
             await ctx.respond(f"Player with Discord ID {user.id} not found in the players collection.")
@@ -172,7 +173,7 @@ class StaffCog(commands.Cog):
             return
 
         # Fetch replays where the player participated
-        replays = dbInfo.replays_collection.find({"players.puuid": player_puuid})
+        replay_stats = await dbInfo.get_replay_stats(player_puuid)
 
         # Initialize total stats
         total_kills = 0
@@ -180,10 +181,7 @@ class StaffCog(commands.Cog):
         total_assists = 0
 
         # Sum up K/D/A stats from each replay
-        for replay in replays:
-            # Find the player's stats from the replay by matching the PUUID
-            player_stats = next((p for p in replay["players"] if p["puuid"] == player_puuid), None)
-
+        for player_stats in replay_stats:
             if player_stats:
                 total_kills += int(player_stats.get("champions_killed", 0))
                 total_deaths += int(player_stats.get("num_deaths", 0))
@@ -205,7 +203,7 @@ class StaffCog(commands.Cog):
             return await ctx.respond(f"This command can only be used in the following channels: {channels_str}", ephemeral=True)
 
         # Fetch team info
-        team_id = dbInfo.team_collection.find_one({"team_id": {"$in": [r.id for r in user.roles]}}, {"_id": 0, "team_id": 1})
+        team_id = await dbInfo.team_directory.find_by_role_ids([r.id for r in user.roles])
         team_info = "Unassigned"
         if team_id:
             team_role = ctx.guild.get_role(team_id["team_id"])
@@ -213,8 +211,8 @@ class StaffCog(commands.Cog):
                 team_info = team_role.mention
 
         # Fetch player intent and info from DB
-        player_intent = dbInfo.intent_collection.find_one({"ID": user.id})
-        player_info = dbInfo.player_collection.find_one({"discord_id": user.id}, {"_id": 0})
+        player_intent = await dbInfo.intent_collection.find_one({"ID": user.id})
+        player_info = await dbInfo.get_player(user.id)
 
         # Fetch player status from intent
         player_status = player_intent.get('Playing', 'N/A') if player_intent else 'N/A'
@@ -315,12 +313,25 @@ class StaffCog(commands.Cog):
     async def admn_update_riotid(self, ctx, user: Option(discord.Member), game_name: Option(str, "Enter user's game name"), tag_line: Option(str, "Enter user's tag line - do not include '#'")):
         await ctx.defer()
         
-        player_data = dbInfo.player_collection.find_one({"discord_id": user.id})
+        player_data = await dbInfo.get_player(user.id)
 
         if not player_data:
             return await ctx.respond(f"{user.mention} was not found in the database.")
         
-        dbInfo.player_collection.update_one({"discord_id": user.id}, {"$set" : {"game_name":game_name, "tag_line":tag_line}})
+        update_fields = {"game_name": game_name, "tag_line": tag_line}
+
+        # Refresh the Riot account cache so the next sweep uses the new account
+        player_cog = self.bot.get_cog("PlayerCog")
+        try:
+            account = await player_cog.resolve_account(game_name, tag_line, refresh=True) if player_cog else None
+        except RiotUnavailableError:
+            account = None
+        if account:
+            update_fields["puuid"] = account["puuid"]
+        else:
+            self.bot.logger.warning(f"Could not resolve Riot ID {game_name}#{tag_line} for {user.name}")
+
+        await dbInfo.player_collection.update_one({"discord_id": user.id}, {"$set": update_fields})
 
         riot_log_channel = self.bot.get_channel(config.riot_id_log_channel)
 
@@ -14,7 +14,7 @@ class SubstitutionCog(commands.Cog):
     @commands.slash_command(guild_ids=[config.lol_server], description="Substitute a player onto a team")
     async def substitute_player(self, ctx, player: discord.Member, team_code: Option(str, "Enter 3-digit team abbreviation"), duration: Option(int, "Enter number for amount of minutes")):
         # Check if the player is a free agent
-        player_data = dbInfo.players_collection.find_one({"discord_id": player.id})
+        player_data = await dbInfo.get_player(player.id)
         if not player_data or player_data.get("team") not in ["FA", None]:
             return await ctx.respond(f"{player.mention} is not a free agent or does not exist in the database.", ephemeral=True)
 
@@ -23,7 +23,7 @@ class SubstitutionCog(commands.Cog):
             return await ctx.respond(f"{player.mention} is not eligible for substitution.", ephemeral=True)
 
         # Find the team role based on team code
-        team_data = dbInfo.teams_collection.find_one({"team_code": team_code.upper()})
+        team_data = await dbInfo.team_directory.get(team_code)
         if not team_data:
             return await ctx.respond(f"Team with code '{team_code}' does not exist.", ephemeral=True)
 
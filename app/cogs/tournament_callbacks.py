@@ -0,0 +1,119 @@
+import asyncio
+import hmac
+import config
+import dbInfo
+from aiohttp import web
+from discord.ext import commands
+from utils.riot_client import RiotUnavailableError
+from .player import summarize_match
+
+# Riot posts a callback to the provider URL (PROVIDER_URL/CALLBACK_SECRET) when a tournament game ends.
+# Test locally with:
+#   curl -X POST localhost:8080/riot/callback/$CALLBACK_SECRET -H "Content-Type: application/json" \
+#        -d '{"shortCode": "NA04...", "gameId": 5000000001, "region": "NA1"}'
+
+# Number of callbacks processed at once
+CALLBACK_WORKERS = 2
+
+# Match-v5 can lag a few seconds behind the callback, so failed fetches are retried after these delays
+FETCH_RETRY_DELAYS = [10, 30, 60, 120, 300]
+
+class TournamentCallbackCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.queue = asyncio.Queue()
+        self.runner = None
+        self.cleanup_tasks = set()  # Keeps the server shutdown referenced until it finishes
+        self.workers = [asyncio.create_task(self.worker()) for _ in range(CALLBACK_WORKERS)]
+        self.server_task = asyncio.create_task(self.start_server())
+
+    def cog_unload(self):
+        self.server_task.cancel()
+        for task in self.workers:
+            task.cancel()
+        if self.runner is not None:
+            task = asyncio.create_task(self.runner.cleanup())
+            self.cleanup_tasks.add(task)
+            task.add_done_callback(self.cleanup_done)
+
+    def cleanup_done(self, task):
+        self.cleanup_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.bot.logger.error(f"Stopping the tournament callback server failed: {task.exception()!r}")
+
+    async def start_server(self):
+        if not config.CALLBACK_SECRET:
+            self.bot.logger.error("CALLBACK_SECRET is not set; the tournament callback endpoint is disabled")
+            return
+        app = web.Application()
+        app.router.add_post(f"{config.CALLBACK_PATH.rstrip('/')}/{{secret}}", self.handle_callback)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, config.CALLBACK_HOST, config.CALLBACK_PORT)
+        try:
+            await site.start()
+        except OSError as e:
+            self.bot.logger.error(f"Could not start tournament callback endpoint on port {config.CALLBACK_PORT}: {e}")
+            return
+        self.bot.logger.info(f"Listening for tournament callbacks on {config.CALLBACK_HOST}:{config.CALLBACK_PORT}{config.CALLBACK_PATH}")
+
+    async def handle_callback(self, request):
+        """Queue a game-completion callback and acknowledge it straight away."""
+        if not hmac.compare_digest(request.match_info["secret"].encode(), config.CALLBACK_SECRET.encode()):
+            raise web.HTTPNotFound()
+
+        try:
+            callback = await request.json()
+        except ValueError:
+            return web.json_response({"error": "Body must be JSON"}, status=400)
+
+        if not isinstance(callback, dict) or not callback.get("shortCode") or not callback.get("gameId"):
+            return web.json_response({"error": "shortCode and gameId are required"}, status=400)
+
+        self.bot.logger.info(f"Tournament callback received for code {callback['shortCode']} (game {callback['gameId']})")
+        self.queue.put_nowait((callback, 0))
+        return web.json_response({"queued": True})
+
+    async def worker(self):
+        while True:
+            callback, attempt = await self.queue.get()
+            try:
+                if await self.ingest(callback):
+                    continue
+                if attempt < len(FETCH_RETRY_DELAYS):
+                    delay = FETCH_RETRY_DELAYS[attempt]
+                    self.bot.logger.info(f"Retrying tournament code {callback['shortCode']} in {delay}s")
+                    asyncio.get_running_loop().call_later(delay, self.queue.put_nowait, (callback, attempt + 1))
+                else:
+                    self.bot.logger.error(f"Giving up on the match for tournament code {callback['shortCode']} after {attempt + 1} attempts")
+            except Exception as e:
+                self.bot.logger.error(f"Error ingesting tournament callback {callback}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def ingest(self, callback):
+        """Fetch and store the match behind a callback.
+
+        Returns False if the match could not be fetched yet and should be retried.
+        """
+        tournament_code = callback['shortCode']
+        if await dbInfo.get_tournament_code(tournament_code) is None:
+            self.bot.logger.warning(f"Ignoring callback for unknown tournament code {tournament_code}")
+            return True
+
+        match_id = f"{callback.get('region', 'NA1')}_{callback['gameId']}"
+        try:
+            match = await self.bot.riot.get_tournament_match(match_id, tournament_code)
+        except RiotUnavailableError as e:
+            self.bot.logger.warning(f"Riot unavailable while fetching match {match_id}: {e}")
+            return False
+        if match is None:
+            return False
+
+        await dbInfo.save_match_details({**summarize_match(match), "tournament_code": tournament_code})
+        await dbInfo.mark_tournament_code_played(tournament_code, match_id)
+        self.bot.logger.info(f"Stored match {match_id} for tournament code {tournament_code}")
+        return True
+
+def setup(bot):
+    bot.add_cog(TournamentCallbackCog(bot))
@@ -1,175 +1,261 @@
-import requests
+import asyncio
 import discord
-import logging
-from discord.ext import commands
+from discord.ext import commands, tasks
 import config
 import dbInfo
 import json
 import io
+from utils.riot_client import RiotUnavailableError
 
-API_KEY = config.RIOT_API
 REGION = 'americas'  
-PROVIDER_URL = 'https://www.unitedrogue.com'
 
-GUILD_ID=1171263858971770901
+# Settings for every code the league generates
+CODE_SETTINGS = {
+    "mapType": "SUMMONERS_RIFT",
+    "pickType": "TOURNAMENT_DRAFT",
+    "spectatorType": "ALL",
+    "teamSize": 5,
+    "metadata": "UR LoL Match"
+}
+
+# Riot caps a single tournament code request at this many codes
+MAX_CODES_PER_REQUEST = 1000
+
+# Unused codes kept on hand for the current tournament, and the level that triggers a refill
+CODE_POOL_SIZE = 60
+CODE_POOL_LOW_WATERMARK = 20
 
-logger = logging.getLogger(__name__)
+GUILD_ID=1171263858971770901
 
 class TournamentCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.refill_lock = asyncio.Lock()
+        self.refill_tasks = set()  # Keeps background refills referenced until they finish
+        self.refill_code_pool.start()
+
+    def cog_unload(self):
+        self.refill_code_pool.cancel()
+        for task in self.refill_tasks:
+            task.cancel()
+
+    def refill_done(self, task):
+        self.refill_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.bot.logger.error(f"Background tournament code refill failed: {task.exception()!r}")
+
+    @tasks.loop(minutes=30)
+    async def refill_code_pool(self):
+        tournament_id = await dbInfo.get_tournament_id()
+        if tournament_id is not None:
+            await self.refill_pool(tournament_id)
+
+    @refill_code_pool.before_loop
+    async def before_refill_code_pool(self):
+        await self.bot.wait_until_ready()
+
+    async def refill_pool(self, tournament_id):
+        """Top the unused code pool back up to CODE_POOL_SIZE once it falls below the low watermark."""
+        if self.refill_lock.locked():
+            return
+        async with self.refill_lock:
+            unused = await dbInfo.count_unused_tournament_codes(tournament_id)
+            if unused >= CODE_POOL_LOW_WATERMARK:
+                return
+            with self.bot.riot.background():
+                tournament_codes = await self.create_codes(tournament_id, CODE_POOL_SIZE - unused)
+            if tournament_codes is None:
+                self.bot.logger.error(f"Failed to refill the tournament code pool for tournament {tournament_id}")
+                return
+            await dbInfo.save_tournament_codes(tournament_id, tournament_codes)
+            self.bot.logger.info(f"Added {len(tournament_codes)} codes to the pool for tournament {tournament_id}")
+
+    async def assign_codes(self, tournament_id, series_names, games_per_series):
+        """Assign `games_per_series` codes to each series, taking them from the pool first.
+
+        Codes the pool can't cover are generated in one batched request. Returns
+        {series: codes}, or None if that request failed.
+        """
+        assigned = {series: await dbInfo.allocate_tournament_codes(tournament_id, series, games_per_series) for series in series_names}
+
+        shortfall = sum(games_per_series - len(codes) for codes in assigned.values())
+        if shortfall:
+            self.bot.logger.warning(f"Tournament code pool is short {shortfall} codes for tournament {tournament_id}; generating them now")
+            new_codes = await self.create_codes(tournament_id, shortfall)
+            if new_codes is None:
+                await dbInfo.release_tournament_codes([code for codes in assigned.values() for code in codes])
+                return None
+            for series, codes in assigned.items():
+                missing = games_per_series - len(codes)
+                if missing:
+                    extra, new_codes = new_codes[:missing], new_codes[missing:]
+                    await dbInfo.save_tournament_codes(tournament_id, extra, status="assigned", series=series)
+                    codes.extend(extra)
+
+        # Refill off the command path so the next request is served from the pool
+        task = asyncio.create_task(self.refill_pool(tournament_id))
+        self.refill_tasks.add(task)
+        task.add_done_callback(self.refill_done)
+        return assigned
 
     @commands.slash_command(guild_ids=[GUILD_ID], description="Register a provider")
     @commands.has_any_role("Bot Guy")
     async def tournament_register_provider(self, ctx):
+        if not config.PROVIDER_URL or not config.CALLBACK_SECRET:
+            await ctx.respond("PROVIDER_URL and CALLBACK_SECRET must both be set before registering a provider.")
+            return
+
         provider_payload = {
             "region": REGION,
-            "url": PROVIDER_URL
+            "url": f"{config.PROVIDER_URL.rstrip('/')}/{config.CALLBACK_SECRET}"
         }
+        self.bot.logger.debug(f"Registering provider for {REGION} at {config.PROVIDER_URL}")
         try:
-            self.bot.logger.debug(f"Provider payload: {provider_payload}")
-            response = requests.post(
-                f"https://americas.api.riotgames.com/lol/tournament/v5/providers",
-                json=provider_payload,
-                headers={"X-Riot-Token": API_KEY}
-            )
-            response.raise_for_status()
-
-            provider_id = int(response.text)
-
-            dbInfo.save_provider_id(provider_id)  # Save provider ID to database
-            await ctx.respond(f"Provider registered with ID: {provider_id}")
-            self.bot.logger.info(f"Provider registered with ID: {provider_id}")
-        except requests.exceptions.RequestException as e:
+            provider_id = await self.bot.riot.register_provider(provider_payload["region"], provider_payload["url"])
+        except RiotUnavailableError as e:
             self.bot.logger.error(f"Failed to register provider: {e}")
+            provider_id = None
+        if provider_id is None:
             await ctx.respond("Failed to register provider. Please check the logs for details.")
+            return
+
+        provider_id = int(provider_id)
+
+        await dbInfo.save_provider_id(provider_id)  # Save provider ID to database
+        await ctx.respond(f"Provider registered with ID: {provider_id}")
+        self.bot.logger.info(f"Provider registered with ID: {provider_id}")
 
     @commands.slash_command(guild_ids=[GUILD_ID], description="Create a new tournament")
     @commands.has_any_role("Bot Guy")
     async def tournament_create(self, ctx, tournament_name: str):
-        provider_id = dbInfo.get_provider_id()  # Retrieve this from your database
-        tournament_payload = {
-            "name": tournament_name,
-            "providerId": provider_id
-        }
+        provider_id = await dbInfo.get_provider_id()  # Retrieve this from your database
         try:
-            response = requests.post(
-                f"https://americas.api.riotgames.com/lol/tournament/v5/tournaments",
-                json=tournament_payload,
-                headers={"X-Riot-Token": API_KEY}
-            )
-            response.raise_for_status()
-
-            tournament_id = int(response.text)
-
-            dbInfo.save_tournament_id(tournament_id, tournament_name) # Save tournament ID to database
-            await ctx.respond(f"Tournament created with ID: {tournament_id}")
-            self.bot.logger.info(f"Tournament created with ID: {tournament_id}")
-        except requests.exceptions.RequestException as e:
+            tournament_id = await self.bot.riot.create_tournament(tournament_name, provider_id)
+        except RiotUnavailableError as e:
             self.bot.logger.error(f"Failed to create tournament: {e}")
+            tournament_id = None
+        if tournament_id is None:
             await ctx.respond("Failed to create tournament. Please check the logs for details.")
+            return
+
+        tournament_id = int(tournament_id)
+
+        await dbInfo.save_tournament_id(tournament_id, tournament_name) # Save tournament ID to database
+        await ctx.respond(f"Tournament created with ID: {tournament_id}")
+        self.bot.logger.info(f"Tournament created with ID: {tournament_id}")
 
     @commands.slash_command(guild_ids=[GUILD_ID], description="Generate tournament codes")
     @commands.has_any_role("Bot Guy", "League Ops")
-    async def tournament_generate_codes(self, ctx, count: int = 3, team1_channel: discord.TextChannel = None, team2_channel: discord.TextChannel = None):
-        tournament_id = dbInfo.get_tournament_id()
-        self.bot.logger.debug(f"Passing tournament ID: {tournament_id}")
+    async def tournament_generate_codes(self, ctx, count: int = 3, team1_channel: discord.TextChannel = None, team2_channel: discord.TextChannel = None, series: str = None):
+        if count < 1:
+            await ctx.respond("Count must be at least 1.", ephemeral=True)
+            return
 
-        code_payload = {
-            "mapType": "SUMMONERS_RIFT",
-            "pickType": "TOURNAMENT_DRAFT",
-            "spectatorType": "ALL",
-            "teamSize": 5,
-            "metadata": "UR LoL Match"
-        }
+        await ctx.defer()
+        tournament_id = await dbInfo.get_tournament_id()
+        if series is None:
+            series = f"{team1_channel.name} vs {team2_channel.name}" if team1_channel and team2_channel else "Manual"
 
-        try:
-            response = requests.post(
-                f"https://americas.api.riotgames.com/lol/tournament/v5/codes?tournamentId={tournament_id}&count={count}",
-                json=code_payload,
-                headers={"X-Riot-Token": API_KEY}
-            )
-            response.raise_for_status()
+        assigned = await self.assign_codes(tournament_id, [series], count)
+        if assigned is None:
+            await ctx.respond("Failed to generate tournament codes. Please check the logs for details.", ephemeral=True)
+            return
+        tournament_codes = assigned[series]
+
+        formatted_codes = '\n'.join(f"Game {i + 1}: {code}" for i, code in enumerate(tournament_codes))
+
+        # Send codes to the provided team channels if specified
+        if team1_channel:
+            await team1_channel.send(f"Here are your codes for your series:\n{formatted_codes}")
+        if team2_channel:
+            await team2_channel.send(f"Here are your codes for your series:\n{formatted_codes}")
+
+        # Respond in the original channel as well
+        await ctx.respond(f"Tournament codes generated:\n{formatted_codes}")
+        self.bot.logger.info(f"Tournament codes generated: {tournament_codes}")
 
-            tournament_codes = response.json()
+    @commands.slash_command(guild_ids=[GUILD_ID], description="Generate tournament codes for a full week of series")
+    @commands.has_any_role("Bot Guy", "League Ops")
+    async def tournament_generate_week(self, ctx, series_count: int, games_per_series: int = 3, week: int = None):
+        if series_count < 1 or games_per_series < 1:
+            await ctx.respond("Series count and games per series must both be at least 1.", ephemeral=True)
+            return
+
+        await ctx.defer()
+        tournament_id = await dbInfo.get_tournament_id()
 
-            dbInfo.save_tournament_codes(tournament_id, tournament_codes)  # Save these codes in your database
+        # Every series is served from the pool, with any shortfall covered by one batched request
+        prefix = f"Week {week} " if week is not None else ""
+        series_names = [f"{prefix}Series {series + 1}" for series in range(series_count)]
+        assigned = await self.assign_codes(tournament_id, series_names, games_per_series)
+        if assigned is None:
+            await ctx.respond("Failed to generate tournament codes. Please check the logs for details.", ephemeral=True)
+            return
 
-            formatted_codes = '\n'.join(f"Game {i + 1}: {code}" for i, code in enumerate(tournament_codes))
+        lines = []
+        for series, series_codes in assigned.items():
+            lines.append(f"{series}:")
+            lines.extend(f"  Game {i + 1}: {code}" for i, code in enumerate(series_codes))
 
-            # Send codes to the provided team channels if specified
-            if team1_channel:
-                await team1_channel.send(f"Here are your codes for your series:\n{formatted_codes}")
-            if team2_channel:
-                await team2_channel.send(f"Here are your codes for your series:\n{formatted_codes}")
+        total_codes = series_count * games_per_series
+        with io.StringIO('\n'.join(lines)) as file:
+            discord_file = discord.File(file, filename=f"tournament_codes_{tournament_id}.txt")
+            await ctx.respond(f"Assigned {total_codes} codes to {series_count} series:", file=discord_file)
+        self.bot.logger.info(f"Assigned {total_codes} tournament codes to {series_count} series")
 
-            # Respond in the original channel as well
-            await ctx.respond(f"Tournament codes generated:\n{formatted_codes}")
-            self.bot.logger.info(f"Tournament codes generated: {tournament_codes}")
+    async def create_codes(self, tournament_id, count):
+        """Create `count` codes, splitting the request at Riot's per-request cap.
 
-        except requests.exceptions.HTTPError as err:
-            error_message = err.response.json().get('message', 'Unknown error')
-            self.bot.logger.error(f"Failed to generate tournament codes: {err} - {error_message}")
-            self.bot.logger.debug(f"Payload: {code_payload}")
-            self.bot.logger.debug(f"Response: {err.response.text}")
-            await ctx.respond(f"Failed to generate tournament codes: {err} - {error_message}", ephemeral=True)
+        Returns the codes in order, or None if any request failed.
+        """
+        self.bot.logger.debug(f"Passing tournament ID: {tournament_id}")
+        batches = [min(MAX_CODES_PER_REQUEST, count - start) for start in range(0, count, MAX_CODES_PER_REQUEST)]
+        try:
+            results = await asyncio.gather(*(
+                self.bot.riot.create_tournament_codes(tournament_id, batch, CODE_SETTINGS) for batch in batches
+            ))
+        except RiotUnavailableError as e:
+            self.bot.logger.error(f"Failed to generate tournament codes: {e}")
+            return None
+        if any(codes is None for codes in results):
+            self.bot.logger.debug(f"Payload: {CODE_SETTINGS}")
+            return None
+        return [code for codes in results for code in codes]
 
-    
-    
     @commands.slash_command(guild_ids=[GUILD_ID], description="Fetch match details and lobby events")
     @commands.has_any_role("Bot Guy", "League Ops", "Commissioner", "Owner")
     async def tournament_fetch_info(self, ctx, tournament_code: str):
         await ctx.defer()
+
+        # Match details and lobby events are independent, so fetch them together
+        self.bot.logger.info(f"Fetching match details and lobby events for tournament code: {tournament_code}")
         try:
-            # Fetch match details
-            self.bot.logger.info(f"Fetching match details for tournament code: {tournament_code}")
-            match_details = self.get_match_details(tournament_code)
-
-            # Fetch lobby events
-            self.bot.logger.info(f"Fetching lobby events for tournament code: {tournament_code}")
-            lobby_events = self.get_lobby_events_by_tournament_code(tournament_code)
-
-            # Prepare the data to write to a file
-            data = {
-                "match_details": match_details,
-                "lobby_events": lobby_events
-            }
-
-            # Convert data to JSON and write to a file-like object
-            with io.StringIO() as file:
-                json.dump(data, file, indent=4)
-                file.seek(0)
-                discord_file = discord.File(file, filename=f"tournament_info_{tournament_code}.json")
-
-                # Send the file as an attachment
-                await ctx.respond("Here are the match details and lobby events:", file=discord_file)
-            self.bot.logger.info(f"Match details and lobby events fetched for tournament code {tournament_code}")
-        except requests.exceptions.RequestException as e:
+            match_details, lobby_events = await asyncio.gather(
+                self.bot.riot.get_tournament_games(tournament_code),
+                self.bot.riot.get_lobby_events(tournament_code)
+            )
+        except RiotUnavailableError as e:
             self.bot.logger.error(f"Failed to fetch tournament info: {e}")
+            match_details = lobby_events = None
+        if match_details is None or lobby_events is None:
             await ctx.respond("Failed to fetch tournament info. Please check the logs for details.")
+            return
+
+        # Prepare the data to write to a file
+        data = {
+            "match_details": match_details,
+            "lobby_events": lobby_events
+        }
+
+        # Convert data to JSON and write to a file-like object
+        with io.StringIO() as file:
+            json.dump(data, file, indent=4)
+            file.seek(0)
+            discord_file = discord.File(file, filename=f"tournament_info_{tournament_code}.json")
+
+            # Send the file as an attachment
+            await ctx.respond("Here are the match details and lobby events:", file=discord_file)
+        self.bot.logger.info(f"Match details and lobby events fetched for tournament code {tournament_code}")
 
-    @staticmethod
-    def get_match_details(tournament_code):
-        response = requests.get(
-            f"https://americas.api.riotgames.com/lol/tournament/v5/games/by-code/{tournament_code}",
-            headers={"X-Riot-Token": API_KEY}
-        )
-        logger.debug(f"Match details response status code: {response.status_code}")
-        response.raise_for_status()
-        match_details = response.json()
-        logger.debug(f"Match details response: {match_details}")
-        return match_details
-
-    @staticmethod
-    def get_lobby_events_by_tournament_code(tournament_code):
-        response = requests.get(
-            f"https://americas.api.riotgames.com/lol/tournament/v5/lobby-events/by-code/{tournament_code}",
-            headers={"X-Riot-Token": API_KEY}
-        )
-        logger.debug(f"Lobby events response status code: {response.status_code}")
-        response.raise_for_status()
-        lobby_events = response.json()
-        logger.debug(f"Lobby events response: {lobby_events}")
-        return lobby_events
 def setup(bot):
     bot.add_cog(TournamentCog(bot))
@@ -26,15 +26,14 @@ class Transactions(commands.Cog):
             logger.error("Roster cog not found.")
 
     async def calculate_team_salary(self, team_code: str):
-        players_on_team = dbInfo.player_collection.find({"team": team_code.upper(), "active_roster": True})
-        total_salary = 0
-
-        for player in players_on_team:
-            salary = player.get("salary", 0)
-            total_salary += salary
-
-        return total_salary
+        return await dbInfo.get_team_salary(team_code)
         
+    async def adjust_remaining_cap(self, team_code: str, amount: int):
+        """Add `amount` to a team's remaining cap. The sum is done in Mongo, so cap edits made outside the bot aren't overwritten."""
+        return await dbInfo.team_directory.update(team_code, [
+            {"$set": {"remaining_cap": {"$add": [{"$ifNull": ["$remaining_cap", SALARY_CAP]}, amount]}}}
+        ])
+
     async def update_nickname(self, member, prefix):
         """Update member's nickname with the given prefix."""
         try:
@@ -52,15 +51,15 @@ class Transactions(commands.Cog):
 
 
     async def get_gm_id(self, team_code: str) -> int:
-        """Retrieve GM ID from the database."""
-        team = dbInfo.team_collection.find_one({"team_code": team_code.upper()})
+        """Retrieve GM ID from the team directory."""
+        team = await dbInfo.team_directory.get(team_code)
         if team:
             return team.get("gm_id")
         return None
     
     async def get_team_role(self, team_code: str) -> int:
-        """Retrieve team role ID from the database."""
-        team = dbInfo.team_collection.find_one({"team_code": team_code.upper()})
+        """Retrieve team role ID from the team directory."""
+        team = await dbInfo.team_directory.get(team_code)
         if team:
             return team.get("team_id")
         return None
@@ -75,11 +74,11 @@ class Transactions(commands.Cog):
     
     async def get_player_info(self, player_id):
         """Fetch player information from the database."""
-        return dbInfo.player_collection.find_one({"discord_id": player_id})
+        return await dbInfo.get_player(player_id)
 
     async def update_team_in_database(self, player_id, new_team):
         """Update the player's team information in the database."""
-        dbInfo.player_collection.update_one({"discord_id": player_id}, {'$set': {'team': new_team}})
+        await dbInfo.player_collection.update_one({"discord_id": player_id}, {'$set': {'team': new_team}})
 
     async def add_role_to_member(self, member, role, reason):
         """Add a role to a member with error handling."""
@@ -291,7 +290,7 @@ class Transactions(commands.Cog):
                     return await ctx.respond(f"{user.mention} is already on a team and cannot be signed.")
 
             # Ensure team is not already filled (5 active roster spots)
-            team_roster_count = dbInfo.player_collection.count_documents({"team":team_code.upper(), "active_roster":True})
+            team_roster_count = await dbInfo.player_collection.count_documents({"team":team_code.upper(), "active_roster":True})
             if team_roster_count >= 5:
                 return await ctx.respond(f"{team_code.upper()} already has 5 players signed to active roster. You must release a player before another can be signed.")
 
@@ -330,15 +329,7 @@ class Transactions(commands.Cog):
             GM = ctx.guild.get_role(gm_role_id)
 
             # Update the team's remaining cap
-            team_entry = dbInfo.team_collection.find_one({"team_code":team_code})
-            remaining_cap = team_entry.get("remaining_cap", SALARY_CAP)
-            new_remaining_cap = remaining_cap - player_salary
-
-            # Update the remaining cap in the database
-            dbInfo.team_collection.update_one(
-                {"team_code": team_code.upper()},
-                {"$set": {"remaining_cap": new_remaining_cap}}
-            )
+            await self.adjust_remaining_cap(team_code, -player_salary)
 
             # Send the transaction message
             message = f"{GM.mention} signs {user.mention} to active roster"
@@ -346,7 +337,7 @@ class Transactions(commands.Cog):
             await channel.send(message)
 
             await self.update_team_in_database(user.id, team_code.upper())
-            dbInfo.player_collection.update_one({"discord_id": user.id}, {"$set": {"active_roster": True}})
+            await dbInfo.player_collection.update_one({"discord_id": user.id}, {"$set": {"active_roster": True}})
             await self.update_nickname(user, team_code.upper())
             await ctx.respond(f"{user.mention} has been signed to {team_code.upper()}")
             await self.update_rosters()
@@ -397,18 +388,8 @@ class Transactions(commands.Cog):
             owner_role = discord.utils.get(ctx.guild.roles, name="Franchise Owner")
             if general_manager_role in user.roles or owner_role in user.roles:
                 # GM-specific release: Mark as non-playing GM, return salary to team's cap
-                team_entry = dbInfo.team_collection.find_one({"team_code": team_code.upper()})
-                if team_entry is None:
+                if await self.adjust_remaining_cap(team_code, player_salary) is None:
                     return await ctx.respond(f"{team_code.upper()} not found in database.")
-                
-                remaining_cap = team_entry.get("remaining_cap", SALARY_CAP)
-                new_remaining_cap = remaining_cap + player_salary
-
-                # Update team's remaining cap in the database
-                dbInfo.team_collection.update_one(
-                    {"team_code": team_code.upper()},
-                    {"$set": {"remaining_cap": new_remaining_cap}}
-                )
 
                 # Notify and update GM status
                 message = f"{team_code.upper()} moves {user.mention} to non-playing GM"
@@ -417,7 +398,7 @@ class Transactions(commands.Cog):
 
                 await self.update_team_in_database(user.id, f"{team_code.upper()}")
                 await self.update_nickname(user, f"{team_code.upper()}")
-                dbInfo.player_collection.update_one({"discord_id": user.id}, {"$set": {"active_roster": False}})
+                await dbInfo.player_collection.update_one({"discord_id": user.id}, {"$set": {"active_roster": False}})
 
                 return await ctx.respond(f"{user.mention} has been moved to non-playing GM")
 
@@ -427,18 +408,8 @@ class Transactions(commands.Cog):
             await self.add_role_to_member(user, FA, "Player released to free agency")
 
             # Update remaining cap for the team
-            team_entry = dbInfo.team_collection.find_one({"team_code": team_code.upper()})
-            if team_entry is None:
+            if await self.adjust_remaining_cap(team_code, player_salary) is None:
                 return await ctx.respond(f"{team_code.upper()} not found in database.")
-            
-            remaining_cap = team_entry.get("remaining_cap", SALARY_CAP)
-            new_remaining_cap = remaining_cap + player_salary
-
-            # Update the team's remaining cap in the database
-            dbInfo.team_collection.update_one(
-                {"team_code": team_code.upper()},
-                {"$set": {"remaining_cap": new_remaining_cap}}
-            )
 
             # Notify about the player release
             gm_role_id = await self.get_gm_id(team_code.upper())
@@ -450,7 +421,7 @@ class Transactions(commands.Cog):
             # Update player in the database and nickname
             await self.update_team_in_database(user.id, 'FA')
             await self.update_nickname(user, 'FA')
-            dbInfo.player_collection.update_one({"discord_id": user.id}, {"$set": {"active_roster": False}})
+            await dbInfo.player_collection.update_one({"discord_id": user.id}, {"$set": {"active_roster": False}})
             await ctx.respond(f"{user.mention} has been released from {team_code.upper()} to free agency")
             await self.update_rosters()
 
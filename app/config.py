@@ -14,7 +14,20 @@ TOURNAMENTS_COLLECTION = os.getenv("TOURNAMENTS_COLLECTION")
 TOURNAMENT_CODES_COLLECTION = os.getenv("TOURNAMENT_CODES_COLLECTION")
 MATCH_DETAILS_COLLECTION = os.getenv("MATCH_DETAILS_COLLECTION")
 REPLAYS_COLLECTION = os.getenv("REPLAYS_COLLECTION")
+RIOT_ACCOUNTS_COLLECTION = os.getenv("RIOT_ACCOUNTS_COLLECTION", "riot_accounts")
+SWEEP_RUNS_COLLECTION = os.getenv("SWEEP_RUNS_COLLECTION", "sweep_runs")
 RIOT_API = os.getenv("RIOT_API")
+RIOT_APP_RATE_LIMIT = os.getenv("RIOT_APP_RATE_LIMIT", "20:1,100:120")
+RIOT_API_BASE_URL = os.getenv("RIOT_API_BASE_URL")  # Leave unset to use the real Riot API
+
+# Embedded endpoint that receives Riot tournament callbacks
+CALLBACK_HOST = os.getenv("CALLBACK_HOST", "0.0.0.0")
+CALLBACK_PORT = int(os.getenv("CALLBACK_PORT", "8080"))
+CALLBACK_PATH = os.getenv("CALLBACK_PATH", "/riot/callback")
+# Secret last path segment of the callback URL; the endpoint stays off while this is unset
+CALLBACK_SECRET = os.getenv("CALLBACK_SECRET")
+# Public URL that reaches CALLBACK_PATH on this bot; the secret is appended when registering with Riot
+PROVIDER_URL = os.getenv("PROVIDER_URL")
 
 # Commonly used server channels
 bot_admin_channel = 1171263860716601366
@@ -1,48 +1,331 @@
 import pymongo
 import config
 import certifi
+import uuid
+from datetime import datetime, timezone
+from utils.team_directory import TeamDirectory
+from utils.player_cache import CachedPlayerCollection, PlayerCache
 
 MongoURL = config.MONGO_URL
 ca = certifi.where()
-cluster = pymongo.MongoClient(MongoURL, tlsCAFile=ca)
+# Async client, so database round trips never block the bot's event loop
+cluster = pymongo.AsyncMongoClient(MongoURL, tlsCAFile=ca)
 
 db = cluster[config.DB_NAME]
 intent_collection = db[config.INTENT_COLLECTION]
-player_collection = db[config.PLAYER_COLLECTION]
+# Player writes go through the wrapper so the cache never serves a stale player
+player_cache = PlayerCache(db[config.PLAYER_COLLECTION])
+player_collection = CachedPlayerCollection(db[config.PLAYER_COLLECTION], player_cache)
 team_collection = db[config.TEAM_COLLECTION]
 providers_collection = db[config.PROVIDERS_COLLECTION]
 tournaments_collection = db[config.TOURNAMENTS_COLLECTION]
 tournament_codes_collection = db[config.TOURNAMENT_CODES_COLLECTION]
 match_details_collection = db[config.MATCH_DETAILS_COLLECTION]
 replays_collection = db[config.REPLAYS_COLLECTION]
+riot_accounts_collection = db[config.RIOT_ACCOUNTS_COLLECTION]
+sweep_runs_collection = db[config.SWEEP_RUNS_COLLECTION]
+
+# Cached teams; team reads and writes go through this instead of team_collection
+team_directory = TeamDirectory(team_collection)
+
+# Indexes every hot query relies on, created on boot by ensure_indexes
+INDEXES = {
+    player_collection: [
+        pymongo.IndexModel("discord_id", unique=True, partialFilterExpression={"discord_id": {"$exists": True}}),
+        pymongo.IndexModel("raw_puuid"),
+        pymongo.IndexModel("puuid"),
+        pymongo.IndexModel([("team", pymongo.ASCENDING), ("active_roster", pymongo.ASCENDING)]),
+        pymongo.IndexModel("left_at"),
+    ],
+    team_collection: [
+        pymongo.IndexModel("team_code", unique=True),
+        pymongo.IndexModel("team_id"),
+    ],
+    replays_collection: [
+        pymongo.IndexModel("match_id", unique=True),
+        pymongo.IndexModel("players.puuid"),
+    ],
+    intent_collection: [
+        # Some intents only carry a lowercase `id`; leaving them out keeps the unique build from failing on them
+        pymongo.IndexModel("ID", unique=True, partialFilterExpression={"ID": {"$exists": True}}),
+        pymongo.IndexModel("Playing"),
+    ],
+    tournament_codes_collection: [
+        pymongo.IndexModel("code", unique=True),
+        pymongo.IndexModel([("tournament_id", pymongo.ASCENDING), ("status", pymongo.ASCENDING)]),
+    ],
+    match_details_collection: [
+        pymongo.IndexModel("match_id", unique=True),
+    ],
+    riot_accounts_collection: [
+        pymongo.IndexModel("riot_id", unique=True),
+    ],
+    sweep_runs_collection: [
+        pymongo.IndexModel("run_id", unique=True),
+        pymongo.IndexModel([("kind", pymongo.ASCENDING), ("started_at", pymongo.DESCENDING)]),
+    ],
+}
+
+# Representative filters of the hot queries, explained on boot to catch collection scans
+HOT_QUERIES = [
+    (player_collection, {"discord_id": 0}),
+    (player_collection, {"raw_puuid": ""}),
+    (player_collection, {"puuid": ""}),
+    (player_collection, {"team": "", "active_roster": True}),
+    (player_collection, {"left_at": None}),
+    (team_collection, {"team_code": ""}),
+    (team_collection, {"team_id": 0}),
+    (replays_collection, {"match_id": ""}),
+    (replays_collection, {"players.puuid": ""}),
+    (intent_collection, {"ID": 0}),
+    (intent_collection, {"Playing": "Yes"}),
+    (tournament_codes_collection, {"tournament_id": 0, "status": "unused"}),
+    (match_details_collection, {"match_id": ""}),
+    (riot_accounts_collection, {"riot_id": ""}),
+]
+
+# Indexes
+async def ensure_indexes(logger):
+    """Create any missing index from INDEXES, then check the hot queries use them."""
+    for collection, indexes in INDEXES.items():
+        for index in indexes:
+            try:
+                await collection.create_indexes([index])
+            except pymongo.errors.OperationFailure as e:
+                # Usually duplicate data blocking a unique index; the bot still works without it
+                logger.error(f"Could not create index {index.document['name']} on {collection.name}: {e}")
+    await log_collection_scans(logger)
+
+async def log_collection_scans(logger):
+    """Log every hot query whose winning plan still scans the whole collection.
+
+    Only the representative filters in HOT_QUERIES are explained, once per boot;
+    other queries the bot runs are not checked.
+    """
+    for collection, query in HOT_QUERIES:
+        try:
+            plan = await collection.find(query).explain()
+        except pymongo.errors.PyMongoError as e:
+            logger.warning(f"Could not explain query {query} on {collection.name}: {e}")
+            continue
+        if "COLLSCAN" in _plan_stages(plan.get("queryPlanner", {}).get("winningPlan", {})):
+            logger.warning(f"Query {query} on {collection.name} is doing a collection scan")
+
+def _plan_stages(plan):
+    stages = {plan.get("stage")}
+    for child in [plan.get("queryPlan"), plan.get("inputStage"), *plan.get("inputStages", [])]:
+        if child:
+            stages |= _plan_stages(child)
+    return stages
+
+# Player Collection
+async def get_player(discord_id):
+    return await player_cache.get("discord_id", discord_id)
+
+async def get_players_by_raw_puuid(raw_puuids):
+    """Players for a batch of raw PUUIDs, keyed by raw_puuid; unknown PUUIDs are left out."""
+    return await player_cache.get_many("raw_puuid", raw_puuids)
+
+# Fields each bulk player read needs, so none of them pull rank history, alts or avatars they don't use
+SWEEP_FIELDS = {"_id": 0, "discord_id": 1, "name": 1, "game_name": 1, "tag_line": 1, "puuid": 1,
+                "summoner_id": 1, "alt_accounts": 1, "match_tracking": 1, "eligible_for_split": 1}
+SALARY_FIELDS = {"_id": 0, "discord_id": 1, "name": 1, "team": 1, "salary": 1, "manual_salary": 1,
+                 "rank_info": 1, "historical_rank_info": 1, "peak_rank": 1}
+RANK_FIELDS = {"_id": 0, "name": 1, "rank_info": 1}
+ROSTER_FIELDS = {"_id": 0, "nickname": 1, "salary": 1, "manual_salary": 1}
+TEAM_FIELDS = {"_id": 0, "team": 1}
+
+async def get_sweep_players():
+    """Players still in the server, with only what rank and split sweeps read."""
+    return await player_collection.find({"left_at": None}, SWEEP_FIELDS).to_list(None)
+
+async def get_unsalaried_players():
+    return await player_collection.find({"left_at": None, "salary": None}, SALARY_FIELDS).to_list(None)
+
+
+async def get_ranked_players(discord_ids):
+    return await player_collection.find({"left_at": None, "discord_id": {"$in": list(discord_ids)}}, RANK_FIELDS).to_list(None)
+
+async def get_players_by_discord_id(fields):
+    """Every player projected to `fields`, keyed by discord_id, for loops over the whole guild."""
+    players = player_collection.find({"discord_id": {"$ne": None}}, {**fields, "discord_id": 1})
+    return {player["discord_id"]: player async for player in players}
+
+async def get_team_salary(team_code):
+    players = player_collection.find({"team": team_code.upper(), "active_roster": True}, {"_id": 0, "salary": 1})
+    return sum([player.get("salary", 0) async for player in players])
+
+async def get_roster(team_code):
+    """Active, non-reserve players on a team, with just what the roster embed shows."""
+    return await player_collection.find({"team": team_code, "active_roster": True, "reserve_player": {"$ne": True}}, ROSTER_FIELDS).to_list(None)
+
+async def get_playing_ids(playing="Yes", id_field="ID"):
+    return [intent[id_field] async for intent in intent_collection.find({"Playing": playing}, {"_id": 0, id_field: 1}) if id_field in intent]
+
+# Replays Collection
+async def save_submission(replays, standings):
+    """Insert a submission's replays and apply its standings updates together.
+
+    `standings` maps team_code to an update such as {"$inc": {"wins": 1}}. Both
+    writes run in one transaction, so a crash can't save the replays without the
+    result; deployments without transaction support get the two writes unwrapped.
+    """
+    operations = [pymongo.UpdateOne({"team_code": code}, update) for code, update in standings.items()]
+
+    async def write(session):
+        if replays:
+            await replays_collection.insert_many(replays, session=session)
+        if operations:
+            await team_collection.bulk_write(operations, session=session)
+
+    try:
+        async with cluster.start_session() as session:
+            await session.with_transaction(write)
+    except pymongo.errors.OperationFailure as e:
+        # 20 (IllegalOperation): standalone server, which can't run transactions
+        if e.code != 20:
+            raise
+        await write(None)
+    await team_directory.refresh(standings)
+
+async def get_recorded_match_ids(match_ids):
+    """The subset of `match_ids` that already have a replay stored."""
+    return set(await replays_collection.distinct("match_id", {"match_id": {"$in": list(match_ids)}}))
+
+async def get_replay_stats(puuid):
+    """Each replay's stats for one player, projected down to that player's entry."""
+    return [replay["players"][0] async for replay in replays_collection.find({"players.puuid": puuid}, {"_id": 0, "players.$": 1})]
 
 # Providers Collection
-def get_provider_id():
-    provider = providers_collection.find_one()
+async def get_provider_id():
+    provider = await providers_collection.find_one()
     return provider['provider_id'] if provider else None
 
-def save_provider_id(provider_id):
-    providers_collection.update_one({}, {"$set": {"provider_id": provider_id}}, upsert=True)
+async def save_provider_id(provider_id):
+    await providers_collection.update_one({}, {"$set": {"provider_id": provider_id}}, upsert=True)
 
 # Tournaments Collection
-def get_tournament_id():
-    tournament = tournaments_collection.find_one()
+async def get_tournament_id():
+    tournament = await tournaments_collection.find_one()
     return tournament['tournament_id'] if tournament else None
 
-def save_tournament_id(tournament_id, name):
-    tournaments_collection.update_one({}, {"$set": {"tournament_id": tournament_id, "name": name}}, upsert=True)
+async def save_tournament_id(tournament_id, name):
+    await tournaments_collection.update_one({}, {"$set": {"tournament_id": tournament_id, "name": name}}, upsert=True)
 
 # TournamentCodes Collection
-def save_tournament_codes(tournament_id, tournament_codes):
-    tournament_codes_collection.insert_many([{"code": code, "tournament_id": tournament_id, "status": "unused"} for code in tournament_codes])
+async def save_tournament_codes(tournament_id, tournament_codes, status="unused", series=None):
+    if not tournament_codes:
+        # insert_many rejects an empty batch
+        return
+    documents = [{"code": code, "tournament_id": tournament_id, "status": status} for code in tournament_codes]
+    if series is not None:
+        for document in documents:
+            document.update({"series": series, "assigned_at": datetime.now(timezone.utc)})
+    await tournament_codes_collection.insert_many(documents)
+
+async def count_unused_tournament_codes(tournament_id):
+    return await tournament_codes_collection.count_documents({"tournament_id": tournament_id, "status": "unused"})
+
+async def allocate_tournament_codes(tournament_id, series, count):
+    """Atomically mark up to `count` unused codes as assigned to `series`, oldest first.
 
-def get_tournament_codes(tournament_id):
+    Returns the allocated codes, which may be fewer than `count` if the pool runs dry.
+    """
+    codes = []
+    for _ in range(count):
+        code = await tournament_codes_collection.find_one_and_update(
+            {"tournament_id": tournament_id, "status": "unused"},
+            {"$set": {"status": "assigned", "series": series, "assigned_at": datetime.now(timezone.utc)}},
+            sort=[("_id", pymongo.ASCENDING)],
+            return_document=pymongo.ReturnDocument.AFTER
+        )
+        if code is None:
+            break
+        codes.append(code['code'])
+    return codes
+
+async def get_tournament_code(code):
+    return await tournament_codes_collection.find_one({"code": code}, {"_id": 0})
+
+async def mark_tournament_code_played(code, match_id):
+    await tournament_codes_collection.update_one({"code": code}, {"$set": {"status": "played", "match_id": match_id}})
+
+async def release_tournament_codes(tournament_codes):
+    """Return assigned codes to the unused pool."""
+    await tournament_codes_collection.update_many(
+        {"code": {"$in": tournament_codes}, "status": "assigned"},
+        {"$set": {"status": "unused"}, "$unset": {"series": "", "assigned_at": ""}}
+    )
+
+async def get_tournament_codes(tournament_id):
     codes = tournament_codes_collection.find({"tournament_id": tournament_id})
-    return [code['code'] for code in codes]
+    return [code['code'] async for code in codes]
 
 # MatchDetails Collection
-def save_match_details(match_details):
-    match_details_collection.insert_one(match_details)
+async def save_match_details(match_details):
+    await match_details_collection.update_one({"match_id": match_details["match_id"]}, {"$set": match_details}, upsert=True)
+
+async def get_match_details(match_id):
+    return await match_details_collection.find_one({"match_id": match_id}, {"_id": 0})
+
+# RiotAccounts Collection
+async def get_riot_account(riot_id):
+    return await riot_accounts_collection.find_one({"riot_id": riot_id}, {"_id": 0})
+
+async def save_riot_account(account):
+    await riot_accounts_collection.update_one({"riot_id": account["riot_id"]}, {"$set": account}, upsert=True)
+
+# SweepRuns Collection
+# Identifies this bot process as the owner of the sweep runs it starts or resumes
+SWEEP_OWNER = uuid.uuid4().hex
+
+async def start_sweep_run(kind, player_ids):
+    run = {
+        "run_id": uuid.uuid4().hex,
+        "kind": kind,
+        "status": "running",
+        "owner": SWEEP_OWNER,
+        "player_ids": list(player_ids),
+        "completed_ids": [],
+        "started_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc)
+    }
+    await sweep_runs_collection.insert_one(run)
+    run.pop("_id", None)
+    return run
+
+async def get_running_sweep_run(kind):
+    return await sweep_runs_collection.find_one({"kind": kind, "status": "running"}, {"_id": 0}, sort=[("started_at", pymongo.DESCENDING)])
+
+async def get_latest_sweep_run(kind):
+    return await sweep_runs_collection.find_one({"kind": kind}, {"_id": 0}, sort=[("started_at", pymongo.DESCENDING)])
+
+async def claim_sweep_run(run_id, stale_before):
+    """Take over a running sweep whose heartbeat is older than `stale_before`.
+
+    Returns the claimed run, or None if it is still live or another process claimed it first.
+    """
+    return await sweep_runs_collection.find_one_and_update(
+        {"run_id": run_id, "status": "running", "updated_at": {"$lt": stale_before}},
+        {"$set": {"owner": SWEEP_OWNER, "updated_at": datetime.now(timezone.utc)}},
+        projection={"_id": 0},
+        return_document=pymongo.ReturnDocument.AFTER
+    )
+
+async def heartbeat_sweep_run(run_id):
+    await sweep_runs_collection.update_one(
+        {"run_id": run_id, "owner": SWEEP_OWNER},
+        {"$set": {"updated_at": datetime.now(timezone.utc)}}
+    )
+
+async def mark_sweep_player_done(run_id, discord_id):
+    await sweep_runs_collection.update_one(
+        {"run_id": run_id},
+        {"$addToSet": {"completed_ids": discord_id}, "$set": {"updated_at": datetime.now(timezone.utc)}}
+    )
 
-def get_match_details(match_id):
-    return match_details_collection.find_one({"match_id": match_id})
\ No newline at end of file
+async def finish_sweep_run(run_id, status="completed", results=None):
+    await sweep_runs_collection.update_one(
+        {"run_id": run_id},
+        {"$set": {"status": status, "results": results or {}, "finished_at": datetime.now(timezone.utc)}}
+    )
@@ -22,7 +22,7 @@ async def update_nickname(member: discord.Member, prefix: str):
         franchise_owner_role = discord.utils.get(member.roles, name="Franchise Owner")
         if franchise_owner_role:
             # Retrieve the player's team code from the database
-            player_info = dbInfo.player_collection.find_one({"discord_id": member.id})
+            player_info = await dbInfo.get_player(member.id)
             team_code = player_info.get("team", "Unassigned") if player_info else "Unassigned"
             
             if team_code != "Unassigned":
@@ -46,6 +46,6 @@ async def update_nickname(member: discord.Member, prefix: str):
         logger.info(f"Updated nickname for {member.display_name} to {new_nickname}")
 
         # Update nickname in the database
-        dbInfo.player_collection.update_one({"discord_id": member.id}, {'$set': {'nickname': new_nickname}})
+        await dbInfo.player_collection.update_one({"discord_id": member.id}, {'$set': {'nickname': new_nickname}})
     except Exception as e:
         logger.error(f"Error updating nickname for {member.display_name}: {e}")
@@ -0,0 +1,217 @@
+import copy
+import time
+from collections import OrderedDict
+
+# Enough for every rostered player plus the free agents who show up in replays
+PLAYER_CACHE_SIZE = 2048
+
+# Players edited outside the bot (lol-web-app, staff edits in Atlas) are picked up after this many seconds
+PLAYER_CACHE_TTL = 600
+
+# Fields players are looked up by; each gets its own index into the cache
+INDEXED_FIELDS = ("discord_id", "raw_puuid", "puuid")
+
+
+class PlayerCache:
+    """Bounded LRU of player documents, indexed by discord_id, raw_puuid and puuid.
+
+    Only hits are cached, so a player who signs up after a miss is found on the
+    next lookup. Anything that writes players must call invalidate() with the
+    write's filter; CachedPlayerCollection does that for every write in dbInfo.
+    Entries expire after `ttl` seconds to pick up writes made outside the bot.
+
+    Players are deep-copied on the way in and out, since callers edit nested
+    fields such as match_tracking and rank_info in place.
+
+    Every invalidation bumps `generation`, and reads that started before it are
+    not stored, so a lookup racing a write can't cache the pre-write document.
+    """
+
+    def __init__(self, collection, max_size=PLAYER_CACHE_SIZE, ttl=PLAYER_CACHE_TTL):
+        self.collection = collection
+        self.max_size = max_size
+        self.ttl = ttl
+        self.players = OrderedDict()
+        self.loaded_at = {}
+        self.indexes = {field: {} for field in INDEXED_FIELDS}
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, field, value):
+        """Copy of the cached player whose `field` equals `value`, or None if absent or expired."""
+        key = self.indexes[field].get(value)
+        if key is None:
+            return None
+        if time.monotonic() - self.loaded_at[key] >= self.ttl:
+            self._drop(key)
+            return None
+        self.hits += 1
+        self.players.move_to_end(key)
+        return copy.deepcopy(self.players[key])
+
+    async def get(self, field, value):
+        """Get a copy of the player whose `field` equals `value`, or None."""
+        if value is None:
+            return None
+        player = self._cached(field, value)
+        if player is not None:
+            return player
+        self.misses += 1
+        generation = self.generation
+        player = await self.collection.find_one({field: value})
+        if player is not None:
+            self._store(player, generation)
+            return player
+        return None
+
+    async def get_many(self, field, values):
+        """Get copies of the players whose `field` is in `values`, keyed by that value.
+
+        Cached players are served from memory; the rest are fetched with a single $in query.
+        """
+        players = {}
+        missing = []
+        for value in dict.fromkeys(v for v in values if v is not None):
+            player = self._cached(field, value)
+            if player is None:
+                missing.append(value)
+            else:
+                players[value] = player
+        if missing:
+            self.misses += len(missing)
+            generation = self.generation
+            async for player in self.collection.find({field: {"$in": missing}}):
+                self._store(player, generation)
+                players[player[field]] = player
+        return players
+
+    def _store(self, player, generation):
+        if generation != self.generation:
+            # Read before an invalidation; the write may have changed this player since
+            return
+        self._drop(player["_id"])
+        self.players[player["_id"]] = copy.deepcopy(player)
+        self.loaded_at[player["_id"]] = time.monotonic()
+        for field in INDEXED_FIELDS:
+            if player.get(field) is not None:
+                self.indexes[field][player[field]] = player["_id"]
+        while len(self.players) > self.max_size:
+            self._drop(next(iter(self.players)))
+
+    def _drop(self, key):
+        player = self.players.pop(key, None)
+        self.loaded_at.pop(key, None)
+        if player is None:
+            return
+        for field in INDEXED_FIELDS:
+            if self.indexes[field].get(player.get(field)) == key:
+                del self.indexes[field][player[field]]
+
+    def invalidate(self, criteria=None):
+        """Forget the players a write with `criteria` may have touched.
+
+        Filters on a single indexed value drop just that player; anything
+        broader clears the whole cache.
+        """
+        self.generation += 1
+        for field in ("_id",) + INDEXED_FIELDS:
+            value = (criteria or {}).get(field)
+            if value is None or isinstance(value, dict):
+                continue
+            key = value if field == "_id" else self.indexes[field].get(value)
+            if key is not None:
+                self._drop(key)
+            return
+        self.clear()
+
+    def clear(self):
+        self.generation += 1
+        self.players.clear()
+        self.loaded_at.clear()
+        for index in self.indexes.values():
+            index.clear()
+
+
+class CachedPlayerCollection:
+    """The player collection, invalidating the player cache on every write.
+
+    Reads and everything else pass straight through to the wrapped collection.
+    """
+
+    def __init__(self, collection, cache):
+        self._collection = collection
+        self._cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def __hash__(self):
+        return hash(self._collection)
+
+    def __eq__(self, other):
+        return self._collection == getattr(other, "_collection", other)
+
+    async def insert_one(self, document, *args, **kwargs):
+        result = await self._collection.insert_one(document, *args, **kwargs)
+        self._cache.invalidate({"_id": result.inserted_id})
+        return result
+
+    async def insert_many(self, documents, *args, **kwargs):
+        result = await self._collection.insert_many(documents, *args, **kwargs)
+        self._cache.clear()
+        return result
+
+    async def update_one(self, filter, *args, **kwargs):
+        try:
+            return await self._collection.update_one(filter, *args, **kwargs)
+        finally:
+            self._cache.invalidate(filter)
+
+    async def update_many(self, filter, *args, **kwargs):
+        try:
+            return await self._collection.update_many(filter, *args, **kwargs)
+        finally:
+            self._cache.invalidate(filter)
+
+    async def replace_one(self, filter, *args, **kwargs):
+        try:
+            return await self._collection.replace_one(filter, *args, **kwargs)
+        finally:
+            self._cache.invalidate(filter)
+
+    async def delete_one(self, filter, *args, **kwargs):
+        try:
+            return await self._collection.delete_one(filter, *args, **kwargs)
+        finally:
+            self._cache.invalidate(filter)
+
+    async def delete_many(self, filter, *args, **kwargs):
+        try:
+            return await self._collection.delete_many(filter, *args, **kwargs)
+        finally:
+            self._cache.invalidate(filter)
+
+    async def find_one_and_update(self, filter, *args, **kwargs):
+        try:
+            return await self._collection.find_one_and_update(filter, *args, **kwargs)
+        finally:
+            self._cache.invalidate(filter)
+
+    async def find_one_and_replace(self, filter, *args, **kwargs):
+        try:
+            return await self._collection.find_one_and_replace(filter, *args, **kwargs)
+        finally:
+            self._cache.invalidate(filter)
+
+    async def find_one_and_delete(self, filter, *args, **kwargs):
+        try:
+            return await self._collection.find_one_and_delete(filter, *args, **kwargs)
+        finally:
+            self._cache.invalidate(filter)
+
+    async def bulk_write(self, requests, *args, **kwargs):
+        try:
+            return await self._collection.bulk_write(requests, *args, **kwargs)
+        finally:
+            self._cache.clear()
@@ -0,0 +1,419 @@
+import asyncio
+import contextlib
+import contextvars
+import logging
+import random
+import time
+from collections import deque
+from urllib.parse import quote
+
+import aiohttp
+
+# Development keys are limited to 20 requests every second and 100 every 2 minutes.
+DEFAULT_APP_RATE_LIMIT = "20:1,100:120"
+
+# Transient failures (429, 5xx, connection errors) are retried with jittered exponential
+# backoff, or after Retry-After when Riot sends it, for at most RETRY_BUDGET seconds per call.
+RETRY_BASE_DELAY = 1
+RETRY_MAX_DELAY = 30
+RETRY_BUDGET = 120
+
+# Consecutive 5xx or connection failures on a routing value that open its circuit, and for how long
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_COOLDOWN = 60
+
+# Request priorities. Background requests only take a slot when no interactive
+# request is waiting on the same routing value.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+# How often a background request that gave way re-checks for a free slot
+BACKGROUND_YIELD_SECONDS = 0.05
+
+# Memo of the sweep the current task belongs to, if any
+_current_memo = contextvars.ContextVar("riot_request_memo", default=None)
+
+# Priority of requests sent by the current task
+_current_priority = contextvars.ContextVar("riot_request_priority", default=PRIORITY_INTERACTIVE)
+
+def parse_rate_limit(header):
+    """Parse a Riot rate limit string ("20:1,100:120") into (count, seconds) pairs."""
+    limits = []
+    for part in (header or "").split(","):
+        if ":" not in part:
+            continue
+        count, seconds = part.split(":", 1)
+        limits.append((int(count), float(seconds)))
+    return limits
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff, so concurrent callers don't retry in lockstep."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+class RateWindow:
+    """Request budget for a single `count` per `seconds` limit.
+
+    Riot counts requests in fixed windows that start at the first request, so the
+    budget is tracked as a sliding log of request times. A sliding window never
+    lets a burst straddle two of Riot's windows, which a refilling bucket can.
+    """
+
+    def __init__(self, count, seconds):
+        self.count = count
+        self.seconds = seconds
+        self.sent = deque()
+
+    def delay(self, now):
+        """Seconds to wait before another request fits in this window."""
+        while self.sent and now - self.sent[0] >= self.seconds:
+            self.sent.popleft()
+        if len(self.sent) < self.count:
+            return 0
+        return self.seconds - (now - self.sent[0])
+
+    def take(self, now):
+        self.sent.append(now)
+
+
+class RateLimiter:
+    """Enforces Riot's application and method rate limits.
+
+    The application limit applies per routing value (americas, na1, ...), method
+    limits per routing value and route. Limits are taken from the response headers
+    as soon as Riot reports them. Interactive requests are admitted ahead of
+    background ones competing for the same budget.
+    """
+
+    def __init__(self, app_limit=DEFAULT_APP_RATE_LIMIT):
+        self.app_limit = parse_rate_limit(app_limit)
+        self.windows = {}
+        self.limits = {}
+        self.paused_until = {}
+        self.interactive_waiting = {}
+
+    def _scopes(self, region, route):
+        return [("app", region), ("method", region, route)]
+
+    def _windows_for(self, scope):
+        if scope not in self.windows:
+            limits = self.app_limit if scope[0] == "app" else []
+            self.limits[scope] = limits
+            self.windows[scope] = [RateWindow(count, seconds) for count, seconds in limits]
+        return self.windows[scope]
+
+    def _delay(self, scopes, now):
+        delay = 0
+        for scope in scopes:
+            delay = max(delay, self.paused_until.get(scope, 0) - now)
+            for window in self._windows_for(scope):
+                delay = max(delay, window.delay(now))
+        return delay
+
+    async def acquire(self, region, route, priority=PRIORITY_INTERACTIVE):
+        """Wait until a request to `route` fits in every applicable window."""
+        scopes = self._scopes(region, route)
+        interactive = priority == PRIORITY_INTERACTIVE
+        if interactive:
+            self.interactive_waiting[region] = self.interactive_waiting.get(region, 0) + 1
+        try:
+            while True:
+                now = time.monotonic()
+                delay = self._delay(scopes, now)
+                if not interactive and self.interactive_waiting.get(region):
+                    # Give the next free slot to the waiting interactive request
+                    delay = max(delay, BACKGROUND_YIELD_SECONDS)
+                if delay <= 0:
+                    for scope in scopes:
+                        for window in self._windows_for(scope):
+                            window.take(now)
+                    return
+                await asyncio.sleep(delay)
+        finally:
+            if interactive:
+                self.interactive_waiting[region] -= 1
+
+    def update(self, region, route, headers):
+        """Adopt the limits Riot reports for this key and route."""
+        for scope, header in zip(self._scopes(region, route), ("X-App-Rate-Limit", "X-Method-Rate-Limit")):
+            limits = parse_rate_limit(headers.get(header))
+            if not limits or limits == self.limits.get(scope):
+                continue
+            old_windows = {(w.count, w.seconds): w for w in self.windows.get(scope, [])}
+            self.limits[scope] = limits
+            self.windows[scope] = [old_windows.get(limit) or RateWindow(*limit) for limit in limits]
+
+    def pause(self, region, route, seconds, limit_type=None):
+        """Hold back requests after a 429 for as long as Riot asked."""
+        scopes = self._scopes(region, route)
+        if limit_type == "application":
+            scopes = scopes[:1]
+        elif limit_type == "method":
+            scopes = scopes[1:]
+        until = time.monotonic() + seconds
+        for scope in scopes:
+            self.paused_until[scope] = max(self.paused_until.get(scope, 0), until)
+
+
+class RiotUnavailableError(Exception):
+    """Riot kept failing for the whole retry budget, or its circuit is open."""
+
+
+class CircuitBreaker:
+    """Stops requests to a routing value after repeated server errors.
+
+    Once open, requests wait for the cooldown and then probe again; one more
+    failure reopens the circuit straight away, a success closes it.
+    """
+
+    def __init__(self, threshold=CIRCUIT_FAILURE_THRESHOLD, cooldown=CIRCUIT_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = {}
+        self.opened_until = {}
+
+    def is_open(self, region):
+        return self.opened_until.get(region, 0) > time.monotonic()
+
+    async def wait(self, region, deadline):
+        """Wait out an open circuit, raising if it stays open past `deadline`."""
+        opened_until = self.opened_until.get(region, 0)
+        if opened_until <= time.monotonic():
+            return
+        if opened_until > deadline:
+            raise RiotUnavailableError(f"Circuit for {region} is open after repeated server errors")
+        await asyncio.sleep(opened_until - time.monotonic())
+
+    def record_success(self, region):
+        self.failures[region] = 0
+
+    def record_failure(self, region):
+        """Count a failure and return True if it opened the circuit."""
+        self.failures[region] = self.failures.get(region, 0) + 1
+        if self.failures[region] < self.threshold:
+            return False
+        self.opened_until[region] = time.monotonic() + self.cooldown
+        return True
+
+
+class RequestMemo:
+    """Reuses GET results for the length of a sweep.
+
+    Identical requests that are already in flight are joined instead of being
+    sent again. Failed lookups are forgotten so a later call can retry them.
+    """
+
+    def __init__(self):
+        self.requests = {}
+        self.issued = 0
+        self.saved = 0
+
+    async def get(self, key, fetch):
+        request = self.requests.get(key)
+        if request is not None:
+            self.saved += 1
+            return await asyncio.shield(request)
+
+        self.issued += 1
+        request = asyncio.ensure_future(fetch())
+        self.requests[key] = request
+        try:
+            result = await asyncio.shield(request)
+        except Exception:
+            self.requests.pop(key, None)
+            raise
+        if result is None:
+            self.requests.pop(key, None)
+        return result
+
+
+class RiotClient:
+    """Shared Riot API client with a keep-alive connection pool and rate limiting.
+
+    One instance is owned by the bot (``bot.riot``) and every cog calls through it.
+    `base_url` sends every request to another host, such as tools/fake_riot.py.
+    """
+
+    def __init__(self, api_key, app_limit=DEFAULT_APP_RATE_LIMIT, logger=None, pool_size=50, base_url=None):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.limiter = RateLimiter(app_limit)
+        self.breaker = CircuitBreaker()
+        self.logger = logger or logging.getLogger(__name__)
+        self.pool_size = pool_size
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"X-Riot-Token": self.api_key},
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def request(self, method, region, route, path, params=None, json=None):
+        """Send a rate-limited request and return (status, body).
+
+        429s, 5xx responses and connection errors are retried until RETRY_BUDGET
+        runs out, after which RiotUnavailableError is raised.
+        """
+        deadline = time.monotonic() + RETRY_BUDGET
+        attempt = 0
+        while True:
+            await self.breaker.wait(region, deadline)
+            retry_after = None
+            try:
+                status, body, retry_after = await self._send(method, region, route, path, params, json)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status, body = None, f"{type(e).__name__}: {e}"
+
+            if status is not None and status != 429 and status < 500:
+                self.breaker.record_success(region)
+                return status, body
+
+            # 429s are our own budget running out, not a sign that Riot is degraded
+            if status != 429 and self.breaker.record_failure(region):
+                self.logger.warning(f"Opening circuit for {region} for {CIRCUIT_COOLDOWN}s after repeated failures")
+
+            delay = retry_after if retry_after is not None else backoff_delay(attempt)
+            if time.monotonic() + delay > deadline:
+                raise RiotUnavailableError(f"{method} {path} failed after {attempt + 1} attempts: {status or body}")
+            self.logger.warning(f"{method} {path} failed ({status or body}), retrying in {delay:.1f}s")
+            # A 429 has already paused the rate limiter for Retry-After
+            if status != 429:
+                await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _send(self, method, region, route, path, params, json):
+        await self.limiter.acquire(region, route, _current_priority.get())
+        base_url = self.base_url or f"https://{region}.api.riotgames.com"
+        url = f"{base_url}{path}"
+        async with self._get_session().request(method, url, params=params, json=json) as response:
+            self.limiter.update(region, route, response.headers)
+            retry_after = response.headers.get("Retry-After")
+            retry_after = float(retry_after) if retry_after is not None else None
+            if response.status == 429:
+                self.limiter.pause(region, route, retry_after or 1, response.headers.get("X-Rate-Limit-Type"))
+            if response.content_type == "application/json":
+                body = await response.json()
+            else:
+                body = await response.text()
+            return response.status, body, retry_after
+
+    @contextlib.contextmanager
+    def memoize(self):
+        """Share GET results between every task started inside this block."""
+        memo = RequestMemo()
+        token = _current_memo.set(memo)
+        try:
+            yield memo
+        finally:
+            _current_memo.reset(token)
+
+    @contextlib.contextmanager
+    def background(self):
+        """Send every request made inside this block, including from tasks started in it, at background priority."""
+        token = _current_priority.set(PRIORITY_BACKGROUND)
+        try:
+            yield
+        finally:
+            _current_priority.reset(token)
+
+    async def memoized(self, key, fetch):
+        """Await `fetch()` through the current sweep memo, if there is one.
+
+        For callers that keep a small result derived from a large response,
+        so the memo holds that instead of the raw body.
+        """
+        memo = _current_memo.get()
+        if memo is None:
+            return await fetch()
+        return await memo.get(key, fetch)
+
+    async def get(self, region, route, path, params=None, description="resource", memoize=True):
+        """GET a Riot resource, returning the decoded body or None on error.
+
+        Pass memoize=False for large bodies the sweep memo shouldn't hold on to.
+        Raises RiotUnavailableError if Riot could not be reached at all.
+        """
+        memo = _current_memo.get()
+        if memo is None or not memoize:
+            return await self._get(region, route, path, params, description)
+        key = (region, path, tuple(sorted((params or {}).items())))
+        return await memo.get(key, lambda: self._get(region, route, path, params, description))
+
+    async def _get(self, region, route, path, params, description):
+        status, body = await self.request("GET", region, route, path, params=params)
+        if status == 200:
+            return body
+        self.logger.error(f"Error fetching {description} (HTTP {status}): {body}")
+        return None
+
+    async def post(self, region, route, path, params=None, json=None, description="resource"):
+        """POST to a Riot endpoint, returning the decoded body or None on error.
+
+        POSTs create resources on Riot's side, so they are never memoized.
+        Raises RiotUnavailableError if Riot could not be reached at all.
+        """
+        status, body = await self.request("POST", region, route, path, params=params, json=json)
+        if status == 200:
+            return body
+        self.logger.error(f"Error creating {description} (HTTP {status}): {body}")
+        return None
+
+    # account-v1
+    async def get_account(self, game_name, tag_line):
+        path = f"/riot/account/v1/accounts/by-riot-id/{quote(game_name, safe='')}/{quote(tag_line, safe='')}"
+        return await self.get("americas", "account-v1.by-riot-id", path, description=f"PUUID for {game_name}#{tag_line}")
+
+    # summoner-v4
+    async def get_summoner(self, puuid):
+        path = f"/lol/summoner/v4/summoners/by-puuid/{puuid}"
+        return await self.get("na1", "summoner-v4.by-puuid", path, description=f"Summoner ID for PUUID {puuid}")
+
+    # league-v4
+    async def get_league_entries(self, summoner_id):
+        path = f"/lol/league/v4/entries/by-summoner/{summoner_id}"
+        return await self.get("na1", "league-v4.by-summoner", path, description=f"rank info for Summoner ID {summoner_id}")
+
+    # match-v5
+    async def get_match_ids(self, puuid, **params):
+        path = f"/lol/match/v5/matches/by-puuid/{puuid}/ids"
+        return await self.get("americas", "match-v5.by-puuid", path, params=params, description=f"match history for PUUID {puuid}")
+
+    async def get_match(self, match_id):
+        path = f"/lol/match/v5/matches/{match_id}"
+        # Full match payloads are tens of KB; PlayerCog.get_match_details memoizes its summary instead
+        return await self.get("americas", "match-v5.match", path, description=f"match details for match ID {match_id}", memoize=False)
+
+    async def get_tournament_match(self, match_id, tournament_code):
+        path = f"/lol/match/v5/matches/{match_id}/by-tournament-code/{quote(tournament_code, safe='')}"
+        return await self.get("americas", "match-v5.by-tournament-code", path, description=f"match {match_id} for tournament code {tournament_code}")
+
+    # tournament-v5
+    async def register_provider(self, region, callback_url):
+        payload = {"region": region, "url": callback_url}
+        return await self.post("americas", "tournament-v5.providers", "/lol/tournament/v5/providers", json=payload, description="tournament provider")
+
+    async def create_tournament(self, name, provider_id):
+        payload = {"name": name, "providerId": provider_id}
+        return await self.post("americas", "tournament-v5.tournaments", "/lol/tournament/v5/tournaments", json=payload, description=f"tournament {name}")
+
+    async def create_tournament_codes(self, tournament_id, count, settings):
+        params = {"tournamentId": tournament_id, "count": count}
+        return await self.post("americas", "tournament-v5.codes", "/lol/tournament/v5/codes", params=params, json=settings,
+                               description=f"{count} tournament codes for tournament {tournament_id}")
+
+    async def get_tournament_games(self, tournament_code):
+        path = f"/lol/tournament/v5/games/by-code/{quote(tournament_code, safe='')}"
+        return await self.get("americas", "tournament-v5.games-by-code", path, description=f"games for tournament code {tournament_code}")
+
+    async def get_lobby_events(self, tournament_code):
+        path = f"/lol/tournament/v5/lobby-events/by-code/{quote(tournament_code, safe='')}"
+        return await self.get("americas", "tournament-v5.lobby-events", path, description=f"lobby events for tournament code {tournament_code}")
@@ -0,0 +1,215 @@
+import asyncio
+import json
+import logging
+import mmap
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# A .rofl starts with these bytes and ends with a JSON metadata block followed by
+# its length as a 4-byte little-endian integer. Everything in between is the
+# replay stream itself, which the bot never needs.
+MAGIC = b"RIOT"
+LENGTH_SIZE = 4
+
+# Metadata blocks are a few tens of KB, so one tail read of this size usually covers it
+TAIL_READ_SIZE = 64 * 1024
+
+# Stored player field and the statsJson key it comes from, in the order fields are saved.
+# Fields with no key are filled in by the bot after parsing.
+PLAYER_STAT_FIELDS = (
+    ("assists", "ASSISTS"),
+    ("baron_kills", "BARON_KILLS"),
+    ("barracks_killed", "BARRACKS_KILLED"),
+    ("barracks_takedowns", "BARRACKS_TAKEDOWNS"),
+    ("champions_killed", "CHAMPIONS_KILLED"),
+    ("double_kills", "DOUBLE_KILLS"),
+    ("dragon_kills", "DRAGON_KILLS"),
+    ("exp", "EXP"),
+    ("gold_earned", "GOLD_EARNED"),
+    ("id", "ID"),
+    ("individual_position", "INDIVIDUAL_POSITION"),
+    ("largest_attack_damage", "LARGEST_ATTACK_DAMAGE"),
+    ("largest_multi_kill", "LARGEST_MULTI_KILL"),
+    ("magic_damage_dealt_to_champions", "MAGIC_DAMAGE_DEALT_TO_CHAMPIONS"),
+    ("minions_killed", "MINIONS_KILLED"),
+    ("missions_championskilled", "Missions_ChampionsKilled"),
+    ("missions_creepscore", "Missions_CreepScore"),
+    ("missions_creepscoreby10minutes", "Missions_CreepScoreBy10Minutes"),
+    ("missions_goldperminute", "Missions_GoldPerMinute"),
+    ("missions_minionskilled", "Missions_MinionsKilled"),
+    ("missions_takedownsbefore15min", "Missions_TakedownsBefore15Min"),
+    ("name", "NAME"),
+    ("num_deaths", "NUM_DEATHS"),
+    ("penta_kills", "PENTA_KILLS"),
+    ("physical_damage_dealt_player", "PHYSICAL_DAMAGE_DEALT_PLAYER"),
+    ("physical_damage_dealt_to_champions", "PHYSICAL_DAMAGE_DEALT_TO_CHAMPIONS"),
+    ("physical_damage_taken", "PHYSICAL_DAMAGE_TAKEN"),
+    ("player_position", "PLAYER_POSITION"),
+    ("puuid", "PUUID"),
+    ("quadra_kills", "QUADRA_KILLS"),
+    ("rift_herald_kills", "RIFT_HERALD_KILLS"),
+    ("sight_wards_bought_in_game", "SIGHT_WARDS_BOUGHT_IN_GAME"),
+    ("skin", "SKIN"),
+    ("team_id", "TEAM"),
+    ("team_code", None),
+    ("team_objective", "TEAM_OBJECTIVE"),
+    ("team_position", "TEAM_POSITION"),
+    ("time_ccing_others", "TIME_CCING_OTHERS"),
+    ("total_damage_dealt", "TOTAL_DAMAGE_DEALT"),
+    ("total_damage_dealt_to_champions", "TOTAL_DAMAGE_DEALT_TO_CHAMPIONS"),
+    ("total_damage_taken", "TOTAL_DAMAGE_TAKEN"),
+    ("total_heal_on_teammates", "TOTAL_HEAL_ON_TEAMMATES"),
+    ("total_time_crowd_control_dealt", "TOTAL_TIME_CROWD_CONTROL_DEALT"),
+    ("total_time_crowd_control_dealt_to_champions", "TOTAL_TIME_CROWD_CONTROL_DEALT_TO_CHAMPIONS"),
+    ("total_time_spent_dead", "TOTAL_TIME_SPENT_DEAD"),
+    ("total_units_healed", "TOTAL_UNITS_HEALED"),
+    ("triple_kills", "TRIPLE_KILLS"),
+    ("true_damage_dealt_player", "TRUE_DAMAGE_DEALT_PLAYER"),
+    ("true_damage_dealt_to_champions", "TRUE_DAMAGE_DEALT_TO_CHAMPIONS"),
+    ("true_damage_taken", "TRUE_DAMAGE_TAKEN"),
+    ("victory_point_total", "VICTORY_POINT_TOTAL"),
+    ("vision_score", "VISION_SCORE"),
+    ("vision_wards_bought_in_game", "VISION_WARDS_BOUGHT_IN_GAME"),
+    ("win", "WIN"),
+)
+
+PLAYER_STAT_DEFAULTS = {"name": "Unknown", "team_code": ""}
+
+
+class RoflError(Exception):
+    """The file isn't a replay, or its metadata block is malformed."""
+
+
+class PlayerStats:
+    """One player's stat line from a replay, with a slot for each PLAYER_STAT_FIELDS entry."""
+
+    __slots__ = tuple(field for field, _ in PLAYER_STAT_FIELDS)
+
+    def __init__(self, **fields):
+        for field in self.__slots__:
+            setattr(self, field, fields.get(field, PLAYER_STAT_DEFAULTS.get(field)))
+
+    @classmethod
+    def from_rofl(cls, stats):
+        player = cls.__new__(cls)
+        for field, key in PLAYER_STAT_FIELDS:
+            default = PLAYER_STAT_DEFAULTS.get(field)
+            setattr(player, field, stats.get(key, default) if key else default)
+        return player
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+def parse_metadata(metadata):
+    """Turn a replay's metadata block into (match_metadata, players)."""
+    match_metadata = {
+        "game_creation": metadata.get('gameCreation'),
+        "game_duration": metadata.get('gameDuration'),
+        "game_mode": metadata.get('gameMode'),
+        "game_type": metadata.get('gameType'),
+        "platform_id": metadata.get('platformId'),
+        "teams": []
+    }
+
+    for team in metadata.get('teams', []):
+        team_id = team.get('teamId')
+        match_metadata['teams'][team_id] = {
+            "win": team.get('win'),
+            "first_blood": team.get('firstBlood'),
+            "first_tower": team.get('firstTower'),
+            "dragon_kills": team.get('dragonKills'),
+            "baron_kills": team.get('baronKills')
+        }
+
+    try:
+        stats = json.loads(metadata['statsJson'])
+    except (KeyError, TypeError, ValueError) as e:
+        raise RoflError(f"Replay metadata has no readable player stats: {e}") from e
+
+    players = []
+    for p in stats:
+        player = PlayerStats.from_rofl(p)
+        if not player.name:
+            logger.warning(f"Player with UUID {player.puuid} has no name.")
+        players.append(player)
+    return match_metadata, players
+
+
+def metadata_length(tail):
+    if len(tail) < LENGTH_SIZE:
+        raise RoflError("Replay is too short to hold a metadata block")
+    return int.from_bytes(tail[-LENGTH_SIZE:], "little")
+
+
+def decode_metadata(tail, length):
+    """Decode the `length`-byte metadata block sitting just before the last LENGTH_SIZE bytes of `tail`."""
+    if length + LENGTH_SIZE > len(tail):
+        raise RoflError(f"Metadata block of {length} bytes runs past the start of the replay")
+    try:
+        return json.loads(bytes(tail[-(length + LENGTH_SIZE):-LENGTH_SIZE]).decode("utf-8"))
+    except (UnicodeDecodeError, ValueError) as e:
+        raise RoflError(f"Replay metadata is not valid JSON: {e}") from e
+
+
+def read_file_metadata(path):
+    """Read the metadata of a replay on disk without loading the replay stream."""
+    with open(path, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            raise RoflError("Replay file is empty") from e
+        with data:
+            if data[:len(MAGIC)] != MAGIC:
+                raise RoflError("File is not a League of Legends replay")
+            return decode_metadata(data, metadata_length(data))
+
+
+class RoflReader:
+    """Reads replay metadata from a URL with ranged requests.
+
+    Only the magic bytes and the tail of the file are downloaded, so a replay
+    costs a few KB of memory instead of its full size. Servers that ignore
+    Range headers still work; the whole body is then read once.
+    """
+
+    def __init__(self, tail_size=TAIL_READ_SIZE):
+        self.tail_size = tail_size
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60))
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def _fetch(self, url, byte_range, head=False):
+        """Fetch `byte_range` of `url`. Returns (body, ranged), where ranged is False if the server sent the whole file."""
+        async with self._get_session().get(url, headers={"Range": f"bytes={byte_range}"}) as response:
+            if response.status == 206:
+                return await response.read(), True
+            if response.status != 200:
+                raise RoflError(f"Downloading the replay failed with HTTP {response.status}")
+            if head:
+                # No range support; the magic bytes are all we need, so stop reading here
+                return await response.content.read(len(MAGIC)), False
+            return await response.read(), False
+
+    async def read_url_metadata(self, url):
+        """Read the metadata of the replay at `url`."""
+        (head, _), (tail, ranged) = await asyncio.gather(
+            self._fetch(url, f"0-{len(MAGIC) - 1}", head=True),
+            self._fetch(url, f"-{self.tail_size}")
+        )
+        if head[:len(MAGIC)] != MAGIC:
+            raise RoflError("File is not a League of Legends replay")
+        length = metadata_length(tail)
+        if ranged and length + LENGTH_SIZE > len(tail) and len(tail) == self.tail_size:
+            # Unusually large metadata block; fetch exactly as much as it needs
+            tail, _ = await self._fetch(url, f"-{length + LENGTH_SIZE}")
+        return decode_metadata(tail, length)
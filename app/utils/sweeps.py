@@ -0,0 +1,113 @@
+import asyncio
+import contextlib
+from datetime import datetime, timedelta, timezone
+
+import dbInfo
+from utils.riot_client import RiotUnavailableError
+
+# Number of players checked concurrently during a sweep
+SWEEP_WORKERS = 8
+
+# Times a player is attempted in one sweep while Riot is unavailable before they are left for the next run
+MAX_PLAYER_ATTEMPTS = 3
+
+# Interrupted sweeps older than this are abandoned instead of resumed
+SWEEP_RUN_MAX_AGE = timedelta(hours=24)
+
+# A running sweep refreshes its heartbeat this often; one silent for SWEEP_HEARTBEAT_STALE was interrupted
+SWEEP_HEARTBEAT_INTERVAL = 30
+SWEEP_HEARTBEAT_STALE = timedelta(seconds=SWEEP_HEARTBEAT_INTERVAL * 4)
+
+
+async def begin_sweep_run(kind, players, logger):
+    """Start a sweep run, or resume the last one if it was interrupted.
+
+    Returns the run and the players it still has to process, or (None, [])
+    if a sweep of this kind is still live here or in another process.
+    """
+    run = await dbInfo.get_running_sweep_run(kind)
+    if run:
+        now = datetime.now(timezone.utc)
+        updated_at = run['updated_at'].replace(tzinfo=timezone.utc)
+        if now - updated_at < SWEEP_HEARTBEAT_STALE:
+            logger.warning(f"A {kind} sweep ({run['run_id']}) is already running; not starting another.")
+            return None, []
+        started_at = run['started_at'].replace(tzinfo=timezone.utc)
+        if now - started_at < SWEEP_RUN_MAX_AGE:
+            run = await dbInfo.claim_sweep_run(run['run_id'], now - SWEEP_HEARTBEAT_STALE)
+            if run is None:
+                logger.warning(f"Another process resumed the interrupted {kind} sweep first.")
+                return None, []
+            completed_ids = set(run['completed_ids'])
+            remaining = [player for player in players if player['discord_id'] not in completed_ids]
+            logger.info(f"Resuming {kind} sweep {run['run_id']}: {len(completed_ids)} players already done, {len(remaining)} remaining.")
+            return run, remaining
+        await dbInfo.finish_sweep_run(run['run_id'], status="abandoned")
+        logger.warning(f"Abandoned {kind} sweep {run['run_id']} started at {started_at}.")
+
+    run = await dbInfo.start_sweep_run(kind, [player['discord_id'] for player in players])
+    return run, players
+
+
+@contextlib.contextmanager
+def sweep_heartbeat(run, logger):
+    """Keep a sweep run's heartbeat fresh while the block runs, so it isn't resumed as interrupted."""
+    async def beat():
+        while True:
+            await asyncio.sleep(SWEEP_HEARTBEAT_INTERVAL)
+            try:
+                await dbInfo.heartbeat_sweep_run(run['run_id'])
+            except Exception as e:
+                logger.warning(f"Could not refresh heartbeat of sweep {run['run_id']}: {e}")
+
+    task = asyncio.create_task(beat())
+    try:
+        yield
+    finally:
+        task.cancel()
+
+
+async def process_sweep(run, players, process, logger):
+    """Run `process` on every player with SWEEP_WORKERS workers, marking each one done in `run`.
+
+    `process` returns True for players it updated. A player whose check hits
+    RiotUnavailableError goes to the back of the queue, up to MAX_PLAYER_ATTEMPTS
+    times. Returns the processed, errors and requeued counts.
+    """
+    results = {"processed": 0, "errors": 0, "requeued": 0}
+
+    # Workers share the Riot rate limiter, so throughput is bounded by the API budget
+    queue = asyncio.Queue()
+    for player_record in players:
+        queue.put_nowait((player_record, 1))
+
+    async def worker():
+        while True:
+            player_record, attempt = await queue.get()
+            try:
+                if await process(player_record):
+                    results["processed"] += 1
+                await dbInfo.mark_sweep_player_done(run['run_id'], player_record['discord_id'])
+            except RiotUnavailableError as e:
+                # Riot is degraded; try the player again once the rest of the queue has had its turn
+                if attempt < MAX_PLAYER_ATTEMPTS:
+                    logger.warning(f"Riot unavailable for player {player_record.get('name')}, requeueing: {e}")
+                    queue.put_nowait((player_record, attempt + 1))
+                    results["requeued"] += 1
+                else:
+                    logger.error(f"Riot unavailable for player {player_record.get('name')} after {attempt} attempts: {e}")
+                    results["errors"] += 1
+            except Exception as e:
+                logger.error(f"Error processing player {player_record.get('name')}: {e}")
+                results["errors"] += 1
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(SWEEP_WORKERS)]
+    try:
+        await queue.join()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+    return results
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import time
+
+import pymongo
+
+# Teams edited outside the bot are picked up after this many seconds
+TEAM_DIRECTORY_TTL = 600
+
+
+class TeamDirectory:
+    """In-memory copy of the team collection, indexed by team_code and team_id.
+
+    Teams change rarely, so they are loaded once and every team write goes through
+    the directory, which stores the document Mongo returns. Lookups return copies,
+    so callers can't change the cached teams by accident.
+    """
+
+    def __init__(self, collection, logger=None, ttl=TEAM_DIRECTORY_TTL):
+        self.collection = collection
+        self.logger = logger or logging.getLogger(__name__)
+        self.ttl = ttl
+        self.by_code = {}
+        self.by_id = {}
+        self.loaded_at = None
+        self._lock = asyncio.Lock()
+
+    async def load(self):
+        """Reload every team from the database."""
+        teams = await self.collection.find({}).to_list(None)
+        self.by_code = {}
+        self.by_id = {}
+        for team in teams:
+            self._index(team)
+        self.loaded_at = time.monotonic()
+        self.logger.debug(f"Loaded {len(teams)} teams into the team directory")
+
+    def invalidate(self):
+        self.loaded_at = None
+
+    async def _ensure_loaded(self):
+        if self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl:
+            return
+        async with self._lock:
+            if self.loaded_at is None or time.monotonic() - self.loaded_at >= self.ttl:
+                await self.load()
+
+    def _index(self, team):
+        old = self.by_code.get(str(team.get("team_code", "")).upper())
+        if old is not None and old.get("team_id") is not None:
+            self.by_id.pop(old["team_id"], None)
+        if team.get("team_code") is not None:
+            self.by_code[team["team_code"].upper()] = team
+        if team.get("team_id") is not None:
+            self.by_id[team["team_id"]] = team
+
+    async def get(self, team_code):
+        """Get a team by its code (case-insensitive), or None."""
+        if not team_code:
+            return None
+        await self._ensure_loaded()
+        team = self.by_code.get(team_code.upper())
+        return dict(team) if team else None
+
+    async def get_by_id(self, team_id):
+        """Get a team by its Discord role ID, or None."""
+        await self._ensure_loaded()
+        team = self.by_id.get(team_id)
+        return dict(team) if team else None
+
+    async def find_by_role_ids(self, role_ids):
+        """Get the first team whose role is among `role_ids`, or None."""
+        await self._ensure_loaded()
+        for role_id in role_ids:
+            if role_id in self.by_id:
+                return dict(self.by_id[role_id])
+        return None
+
+    async def all(self):
+        await self._ensure_loaded()
+        return [dict(team) for team in self.by_code.values()]
+
+    async def refresh(self, team_codes):
+        """Re-read the given teams after a write that bypassed update()."""
+        codes = [team["team_code"] for team in [await self.get(code) for code in team_codes] if team]
+        if codes:
+            async for team in self.collection.find({"team_code": {"$in": codes}}):
+                self._index(team)
+
+    async def update(self, team_code, update):
+        """Apply `update` to a team in Mongo and cache the result.
+
+        Returns the updated team, or None if there is no team with that code.
+        """
+        team = await self.get(team_code)
+        criteria = {"team_code": team["team_code"] if team else team_code.upper()}
+        updated = await self.collection.find_one_and_update(criteria, update, return_document=pymongo.ReturnDocument.AFTER)
+        if updated is not None:
+            self._index(updated)
+        return dict(updated) if updated else None
@@ -0,0 +1,69 @@
+"""Benchmark the replay parse path shared by /extract_puuids and replay uploads.
+
+Reads each .rofl given on the command line with utils/rofl.py and runs
+parse_metadata on it. Without files, a synthetic replay with ten players and a
+few MB of padding stands in for a real one. Reports time per read and parse,
+and the peak memory allocated while doing them.
+
+    python tools/bench_rofl.py NA1-1234567890.rofl --iterations 500
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+sys.path.insert(0, APP_DIR)
+
+from utils.rofl import MAGIC, PLAYER_STAT_FIELDS, parse_metadata, read_file_metadata  # noqa: E402
+
+
+def synthetic_replay(path, stream_size):
+    stats = [{key: 1 for _, key in PLAYER_STAT_FIELDS if key} | {"NAME": f"Player {i}", "PUUID": f"puuid-{i}"}
+             for i in range(10)]
+    metadata = json.dumps({"gameLength": 1800000, "statsJson": json.dumps(stats)}).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(os.urandom(stream_size))
+        f.write(metadata)
+        f.write(len(metadata).to_bytes(4, "little"))
+
+
+def bench(path, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        parse_metadata(read_file_metadata(path))
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    parse_metadata(read_file_metadata(path))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{os.path.basename(path)}: {os.path.getsize(path) / 1e6:.1f} MB, "
+          f"{elapsed / iterations * 1e3:.3f} ms per parse, {peak / 1024:.0f} KB peak")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help=".rofl files to parse")
+    parser.add_argument("--iterations", type=int, default=200, help="parses per file")
+    parser.add_argument("--stream-mb", type=float, default=5, help="replay stream size of the synthetic replay")
+    args = parser.parse_args()
+
+    if args.files:
+        for path in args.files:
+            bench(path, args.iterations)
+        return
+
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, "NA1-0000000000.rofl")
+        synthetic_replay(path, int(args.stream_mb * 1e6))
+        bench(path, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Benchmark the rank and eligibility sweep against the local Riot stand-in.
+
+Seeds N synthetic players into a scratch MongoDB database, starts tools/fake_riot.py
+in-process and runs PlayerCog.update_ranks_and_check against it. Reports wall time,
+throughput, p50/p99 request latency and the number of Riot requests sent.
+
+    MONGO_URL=mongodb://localhost:27017 python tools/bench_sweep.py --players 300 --runs 2
+
+Later runs reuse the caches and match tracking written by the earlier ones, so
+`--runs 2` shows a cold sweep followed by a warm one. The scratch database is
+dropped afterwards unless --keep-db is given.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+from aiohttp import web
+
+import fake_riot
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+
+# Collection names used in the scratch database when the environment leaves them unset
+SCRATCH_COLLECTIONS = {
+    "INTENT_COLLECTION": "intents",
+    "PLAYER_COLLECTION": "players",
+    "TEAM_COLLECTION": "teams",
+    "PROVIDERS_COLLECTION": "providers",
+    "TOURNAMENTS_COLLECTION": "tournaments",
+    "TOURNAMENT_CODES_COLLECTION": "tournament_codes",
+    "MATCH_DETAILS_COLLECTION": "match_details",
+    "REPLAYS_COLLECTION": "replays",
+}
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def use_scratch_database(db_name):
+    """Point config/dbInfo at the scratch database before either is imported."""
+    if not os.getenv("MONGO_URL"):
+        sys.exit("MONGO_URL must point at a MongoDB server the benchmark can write to.")
+    if os.getenv("DB_NAME") == db_name:
+        sys.exit(f"Refusing to benchmark against the configured DB_NAME '{db_name}'.")
+    os.environ["DB_NAME"] = db_name
+    for name, default in SCRATCH_COLLECTIONS.items():
+        os.environ[name] = os.getenv(name) or default
+    os.environ["RIOT_API"] = "bench"
+    sys.path.insert(0, APP_DIR)
+
+
+async def seed_players(dbInfo, data_args):
+    """Create one player and a 'Playing: Yes' intent per synthetic account."""
+    for collection in (dbInfo.player_collection, dbInfo.intent_collection,
+                       dbInfo.match_details_collection, dbInfo.riot_accounts_collection,
+                       dbInfo.sweep_runs_collection):
+        await collection.delete_many({})
+
+    players = []
+    for index in range(data_args.players):
+        game_name, tag_line = fake_riot.player_riot_id(index)
+        alts = []
+        if data_args.alt_every and index % data_args.alt_every == 0:
+            alt_name, alt_tag = fake_riot.alt_riot_id(index)
+            alts.append({"game_name": alt_name, "tag_line": alt_tag})
+        players.append({
+            "discord_id": 100000 + index,
+            "name": f"bench-{index}",
+            "game_name": game_name,
+            "tag_line": tag_line,
+            "alt_accounts": alts,
+            "left_at": None,
+        })
+    if players:
+        await dbInfo.player_collection.insert_many(players)
+        await dbInfo.intent_collection.insert_many([{"ID": player["discord_id"], "Playing": "Yes"} for player in players])
+
+
+def make_timed_client(RiotClient):
+    class TimedRiotClient(RiotClient):
+        """RiotClient that records how long each request took, rate limit waits included."""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.latencies = []
+            self.statuses = {}
+
+        async def request(self, *args, **kwargs):
+            start = time.perf_counter()
+            status = None
+            try:
+                status, body = await super().request(*args, **kwargs)
+                return status, body
+            finally:
+                self.latencies.append(time.perf_counter() - start)
+                self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    return TimedRiotClient
+
+
+async def run(args):
+    use_scratch_database(args.db)
+    import config
+    import dbInfo
+    from cogs import player
+    from utils import sweeps
+    from utils.riot_client import RiotClient
+
+    if args.match_details:
+        player.COUNT_MATCH_IDS_ONLY = False
+    if args.workers:
+        sweeps.SWEEP_WORKERS = args.workers
+
+    server = fake_riot.server_from_args(args)
+    runner = web.AppRunner(server.build_app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+
+    logger = logging.getLogger("bench")
+    riot = make_timed_client(RiotClient)(config.RIOT_API, config.RIOT_APP_RATE_LIMIT, logger=logger,
+                                         base_url=f"http://127.0.0.1:{port}")
+    cog = player.PlayerCog(SimpleNamespace(logger=logger, riot=riot))
+
+    try:
+        await seed_players(dbInfo, args)
+        print(f"Seeded {args.players} players into {args.db}; fake Riot API on port {port}")
+        print(f"Mode: {'match details' if args.match_details else 'match IDs only'}, workers: {sweeps.SWEEP_WORKERS}")
+
+        for run_number in range(1, args.runs + 1):
+            riot.latencies.clear()
+            riot.statuses.clear()
+            server_requests = server.requests
+            start = time.perf_counter()
+            await cog.update_ranks_and_check()
+            elapsed = time.perf_counter() - start
+
+            total_requests = len(riot.latencies)
+            print(f"\nRun {run_number}")
+            print(f"  wall time:        {elapsed:.2f}s")
+            print(f"  throughput:       {args.players / elapsed:.1f} players/s, {total_requests / elapsed:.1f} requests/s")
+            print(f"  requests:         {total_requests} sent, {server.requests - server_requests} served")
+            print(f"  statuses:         {', '.join(f'{status}: {count}' for status, count in sorted(riot.statuses.items(), key=str))}")
+            print(f"  request latency:  p50 {percentile(riot.latencies, 0.5) * 1000:.1f}ms, "
+                  f"p99 {percentile(riot.latencies, 0.99) * 1000:.1f}ms")
+    finally:
+        await riot.close()
+        await runner.cleanup()
+        if not args.keep_db:
+            await dbInfo.cluster.drop_database(args.db)
+        await dbInfo.cluster.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    fake_riot.add_arguments(parser)
+    parser.add_argument("--db", default="lolbot_bench", help="scratch database to seed and sweep")
+    parser.add_argument("--keep-db", action="store_true", help="leave the scratch database in place")
+    parser.add_argument("--runs", type=int, default=1, help="sweeps to run back to back")
+    parser.add_argument("--workers", type=int, help="override SWEEP_WORKERS")
+    parser.add_argument("--match-details", action="store_true", help="count from match details instead of match IDs")
+    parser.add_argument("--verbose", action="store_true", help="show the sweep's own log output")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(levelname)s %(message)s")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
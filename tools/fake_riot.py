@@ -0,0 +1,275 @@
+"""Local stand-in for the Riot API routes the bot uses.
+
+Serves account-v1, summoner-v4, league-v4, match-v5 and tournament-v5 from seeded
+synthetic data, with configurable latency and injected 429s. Point the bot at it
+with RIOT_API_BASE_URL=http://localhost:8010, or let tools/bench_sweep.py start it.
+
+    python tools/fake_riot.py --players 200 --latency-ms 40 --rate-429 0.01
+"""
+import argparse
+import asyncio
+import itertools
+import random
+from datetime import datetime, timezone
+
+from aiohttp import web
+
+# Synthetic matches are spread over the 2024 splits the eligibility checks count
+MATCH_WINDOW = (
+    datetime(2024, 1, 10, tzinfo=timezone.utc),
+    datetime(2024, 12, 31, tzinfo=timezone.utc),
+)
+
+# Queue mix of the generated matches: solo queue, flex and normal draft
+QUEUES = [(420, 0.7), (440, 0.2), (400, 0.1)]
+RANKED_QUEUES = {420, 440}
+
+TIERS = ["IRON", "BRONZE", "SILVER", "GOLD", "PLATINUM", "EMERALD", "DIAMOND", "MASTER"]
+DIVISIONS = ["IV", "III", "II", "I"]
+
+# Players who queue together; every match in a lobby lists all of its members
+LOBBY_SIZE = 5
+
+
+def player_riot_id(index):
+    return f"Bench{index}", "NA1"
+
+
+def alt_riot_id(index):
+    return f"Bench{index}Alt", "NA1"
+
+
+class FakeRiotData:
+    """Seeded accounts, ranks and match histories.
+
+    Player `index` plays as Bench<index>#NA1, and every `alt_every`-th player also
+    has a Bench<index>Alt#NA1 account. The same seed always produces the same data.
+    """
+
+    def __init__(self, players=100, matches_per_lobby=60, alt_every=3, seed=0):
+        rng = random.Random(seed)
+        self.accounts = {}
+        self.summoners = {}
+        self.entries = {}
+        self.matches = {}
+        self.match_ids = {}
+
+        puuids = []
+        for index in range(players):
+            riot_ids = [player_riot_id(index)]
+            if alt_every and index % alt_every == 0:
+                riot_ids.append(alt_riot_id(index))
+            for game_name, tag_line in riot_ids:
+                puuid = f"fake-puuid-{game_name.lower()}"
+                summoner_id = f"fake-summoner-{game_name.lower()}"
+                self.accounts[(game_name.casefold(), tag_line.casefold())] = {
+                    "puuid": puuid, "gameName": game_name, "tagLine": tag_line
+                }
+                self.summoners[puuid] = {"id": summoner_id, "puuid": puuid, "summonerLevel": rng.randint(30, 500)}
+                self.entries[summoner_id] = [{
+                    "queueType": "RANKED_SOLO_5x5",
+                    "tier": rng.choice(TIERS),
+                    "rank": rng.choice(DIVISIONS),
+                    "leaguePoints": rng.randint(0, 99),
+                    "wins": rng.randint(0, 200),
+                    "losses": rng.randint(0, 200),
+                }]
+                self.match_ids[puuid] = []
+                puuids.append(puuid)
+
+        start_ms = int(MATCH_WINDOW[0].timestamp() * 1000)
+        end_ms = int(MATCH_WINDOW[1].timestamp() * 1000)
+        queues, weights = zip(*QUEUES)
+        match_numbers = itertools.count(5000000000)
+        for offset in range(0, len(puuids), LOBBY_SIZE):
+            lobby = puuids[offset:offset + LOBBY_SIZE]
+            for _ in range(matches_per_lobby):
+                match_id = f"NA1_{next(match_numbers)}"
+                self.matches[match_id] = {
+                    "metadata": {"matchId": match_id, "participants": lobby},
+                    "info": {
+                        "gameCreation": rng.randint(start_ms, end_ms),
+                        "gameDuration": rng.randint(900, 2700),
+                        "queueId": rng.choices(queues, weights)[0],
+                        "participants": [{"puuid": puuid} for puuid in lobby],
+                    },
+                }
+                for puuid in lobby:
+                    self.match_ids[puuid].append(match_id)
+
+        # match-v5 lists the newest match first
+        for ids in self.match_ids.values():
+            ids.sort(key=lambda match_id: self.matches[match_id]["info"]["gameCreation"], reverse=True)
+
+    def find_match_ids(self, puuid, query):
+        queue = int(query["queue"]) if "queue" in query else None
+        ranked_only = query.get("type") == "ranked"
+        start_time = int(query["startTime"]) * 1000 if "startTime" in query else None
+        end_time = int(query["endTime"]) * 1000 if "endTime" in query else None
+
+        found = []
+        for match_id in self.match_ids.get(puuid, []):
+            info = self.matches[match_id]["info"]
+            if queue is not None and info["queueId"] != queue:
+                continue
+            if ranked_only and info["queueId"] not in RANKED_QUEUES:
+                continue
+            if start_time is not None and info["gameCreation"] < start_time:
+                continue
+            if end_time is not None and info["gameCreation"] > end_time:
+                continue
+            found.append(match_id)
+
+        start = int(query.get("start", 0))
+        count = min(int(query.get("count", 20)), 100)
+        return found[start:start + count]
+
+
+class FakeRiotServer:
+    """aiohttp application serving FakeRiotData."""
+
+    def __init__(self, data, latency_ms=0, jitter_ms=0, rate_429=0.0, retry_after=1,
+                 app_limit="500:10,30000:600", seed=0):
+        self.data = data
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.app_limit = app_limit
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.rejected = 0
+        self.tournament_ids = itertools.count(1000)
+        self.code_numbers = itertools.count(1)
+        self.codes = {}
+
+    def build_app(self):
+        app = web.Application(middlewares=[self.simulate])
+        app.add_routes([
+            web.get("/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}", self.get_account),
+            web.get("/lol/summoner/v4/summoners/by-puuid/{puuid}", self.get_summoner),
+            web.get("/lol/league/v4/entries/by-summoner/{summoner_id}", self.get_league_entries),
+            web.get("/lol/match/v5/matches/by-puuid/{puuid}/ids", self.get_match_ids),
+            web.get("/lol/match/v5/matches/{match_id}", self.get_match),
+            web.get("/lol/match/v5/matches/{match_id}/by-tournament-code/{code}", self.get_match),
+            web.post("/lol/tournament/v5/providers", self.create_provider),
+            web.post("/lol/tournament/v5/tournaments", self.create_tournament),
+            web.post("/lol/tournament/v5/codes", self.create_codes),
+            web.get("/lol/tournament/v5/games/by-code/{code}", self.get_games_by_code),
+            web.get("/lol/tournament/v5/lobby-events/by-code/{code}", self.get_lobby_events),
+        ])
+        return app
+
+    @web.middleware
+    async def simulate(self, request, handler):
+        """Add latency, rate limit headers and randomly injected 429s to every response."""
+        self.requests += 1
+        latency = self.latency_ms + self.rng.uniform(0, self.jitter_ms)
+        if latency:
+            await asyncio.sleep(latency / 1000)
+
+        headers = {"X-App-Rate-Limit": self.app_limit}
+        if self.rate_429 and self.rng.random() < self.rate_429:
+            self.rejected += 1
+            headers.update({"Retry-After": str(self.retry_after), "X-Rate-Limit-Type": "application"})
+            return web.json_response({"status": {"message": "Rate limit exceeded", "status_code": 429}},
+                                     status=429, headers=headers)
+
+        response = await handler(request)
+        response.headers.update(headers)
+        return response
+
+    @staticmethod
+    def not_found(message):
+        return web.json_response({"status": {"message": message, "status_code": 404}}, status=404)
+
+    # account-v1
+    async def get_account(self, request):
+        key = (request.match_info["game_name"].casefold(), request.match_info["tag_line"].casefold())
+        account = self.data.accounts.get(key)
+        if account is None:
+            return self.not_found("Data not found - No results found for player with riot id")
+        return web.json_response(account)
+
+    # summoner-v4
+    async def get_summoner(self, request):
+        summoner = self.data.summoners.get(request.match_info["puuid"])
+        if summoner is None:
+            return self.not_found("Data not found - summoner not found")
+        return web.json_response(summoner)
+
+    # league-v4
+    async def get_league_entries(self, request):
+        return web.json_response(self.data.entries.get(request.match_info["summoner_id"], []))
+
+    # match-v5
+    async def get_match_ids(self, request):
+        return web.json_response(self.data.find_match_ids(request.match_info["puuid"], request.query))
+
+    async def get_match(self, request):
+        match = self.data.matches.get(request.match_info["match_id"])
+        if match is None:
+            return self.not_found("Data not found - match file not found")
+        return web.json_response(match)
+
+    # tournament-v5
+    async def create_provider(self, request):
+        return web.json_response(1)
+
+    async def create_tournament(self, request):
+        return web.json_response(next(self.tournament_ids))
+
+    async def create_codes(self, request):
+        tournament_id = int(request.query.get("tournamentId", 0))
+        count = int(request.query.get("count", 1))
+        codes = [f"NA04f-{tournament_id}-{next(self.code_numbers):06d}" for _ in range(count)]
+        for code in codes:
+            self.codes[code] = tournament_id
+        return web.json_response(codes)
+
+    async def get_games_by_code(self, request):
+        code = request.match_info["code"]
+        if code not in self.codes:
+            return self.not_found("Data not found - tournament code not found")
+        match_id = self.rng.choice(list(self.data.matches))
+        return web.json_response([{"gameId": int(match_id.split("_")[1]), "shortCode": code, "region": "NA1"}])
+
+    async def get_lobby_events(self, request):
+        code = request.match_info["code"]
+        if code not in self.codes:
+            return self.not_found("Data not found - tournament code not found")
+        puuids = self.data.matches[self.rng.choice(list(self.data.matches))]["metadata"]["participants"]
+        return web.json_response({"eventList": [
+            {"eventType": "PlayerJoinedGameEvent", "puuid": puuid, "timestamp": "0"} for puuid in puuids
+        ]})
+
+
+def add_arguments(parser):
+    parser.add_argument("--players", type=int, default=100, help="number of synthetic players")
+    parser.add_argument("--matches", type=int, default=60, help="matches played by each lobby of players")
+    parser.add_argument("--alt-every", type=int, default=3, help="give every Nth player an alt account (0 for none)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=30, help="base latency added to every response")
+    parser.add_argument("--jitter-ms", type=float, default=20, help="random extra latency, up to this much")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of requests rejected with a 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with injected 429s")
+    parser.add_argument("--app-limit", default="500:10,30000:600", help="X-App-Rate-Limit header to report")
+
+
+def server_from_args(args):
+    data = FakeRiotData(players=args.players, matches_per_lobby=args.matches, alt_every=args.alt_every, seed=args.seed)
+    return FakeRiotServer(data, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, rate_429=args.rate_429,
+                          retry_after=args.retry_after, app_limit=args.app_limit, seed=args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8010)
+    add_arguments(parser)
+    args = parser.parse_args()
+    web.run_app(server_from_args(args).build_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()